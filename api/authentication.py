@@ -0,0 +1,60 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from rest_framework.authentication import TokenAuthentication
+
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 60 * 5)
+TOKEN_PREFIX = 'api:token'
+
+
+def token_key(key):
+    # В ключе кеша хранится хеш, а не сам токен.
+    return f'{TOKEN_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def forget(*keys):
+    """Сбрасывает токены сразу и еще раз после коммита, чтобы параллельный
+    запрос не вернул в кеш состояние до коммита."""
+    cache_keys = [token_key(key) for key in keys]
+    cache.delete_many(cache_keys)
+    transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
+
+def user_fields(user):
+    """Поля пользователя для кеша, кроме хеша пароля."""
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.attname != 'password'
+    }
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, которая держит пользователя токена в общем
+    кеше на TOKEN_CACHE_TIMEOUT секунд.
+
+    В кеш не попадают ни сам токен, ни хеш пароля: пользователь
+    восстанавливается без поля password, оно дочитывается из базы при
+    обращении. Вытеснение старых записей делает сам кеш. Записи
+    сбрасываются при удалении и смене токена и при изменении
+    пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_key(key)
+        fields = cache.get(cache_key)
+        if fields is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, user_fields(user), TOKEN_CACHE_TIMEOUT)
+            return user, token
+        if not fields['is_active']:
+            forget(key)
+            return super().authenticate_credentials(key)
+        model = get_user_model()
+        user = model.from_db(
+            router.db_for_read(model), list(fields), list(fields.values())
+        )
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,148 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from posts.bulk import delete_owned
+from posts.cache import conditional_response, validators
+
+from .serializers import BulkDeleteSerializer
+
+
+class ConditionalMixin:
+    """ETag и Last-Modified для list и retrieve по версиям областей кеша
+    страниц из get_scopes(); на условный GET с актуальными валидаторами
+    отвечает 304, не обращаясь к базе."""
+
+    def get_scopes(self):
+        raise NotImplementedError
+
+    def conditional(self, request, get_response):
+        if request.method not in ('GET', 'HEAD'):
+            return get_response()
+        etag, last_modified = validators(
+            self.get_scopes(), request.accepted_renderer.format
+        )
+        return conditional_response(request, etag, last_modified,
+                                    get_response)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(
+            request, lambda: super(ConditionalMixin, self).list(
+                request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(
+            request, lambda: super(ConditionalMixin, self).retrieve(
+                request, *args, **kwargs)
+        )
+
+
+class ExpandableViewSetMixin:
+    """Готовит queryset под ?fields= и ?expand= сериализатора с
+    ExpandableSerializerMixin, чтобы база отдавала только нужное."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return self.get_serializer().setup_queryset(queryset)
+
+
+class ValuesReadMixin:
+    """list и retrieve через ValuesSerializerMixin.represent_values,
+    без создания экземпляров моделей и запросов на каждую строку."""
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        rows = serializer.values(
+            self.filter_queryset(self.get_queryset()),
+            *(name.lstrip('-') for name in getattr(
+                self, 'cursor_ordering', ()))
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.represent_values(page)
+            )
+        return Response(serializer.represent_values(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            serializer.values(self.filter_queryset(self.get_queryset())),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(serializer.represent_values([row])[0])
+
+
+class NestedViewSetMixin:
+    """Вложенный ресурс вида /parents/{id}/children/.
+
+    Список и объект берутся одним запросом с фильтром по родителю, а
+    существование родителя проверяется отдельно, только если список пуст
+    или нужно создать объект.
+    """
+    parent_model = None
+    parent_kwarg = None
+
+    def get_parent(self, queryset=None):
+        if queryset is None:
+            queryset = self.parent_model.objects.all()
+        return get_object_or_404(queryset, pk=self.kwargs[self.parent_kwarg])
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        rows = response.data
+        if isinstance(rows, dict):
+            rows = rows['results']
+        if not rows:
+            self.get_parent()
+        return response
+
+
+class BulkMixin:
+    """POST и DELETE на .../bulk/ для пачки объектов в одном запросе.
+
+    POST принимает список объектов, проверяет их все и вставляет одной
+    транзакцией через perform_bulk_create; если хоть один объект не прошел
+    проверку, ничего не сохраняется, а в ответе ошибки по каждому
+    объекту. DELETE принимает {"ids": [...]} и удаляет свои объекты,
+    возвращая статус для каждого id.
+    """
+    max_batch_size = getattr(settings, 'API_MAX_BATCH_SIZE', 500)
+
+    @action(detail=False, methods=['post', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        return self.bulk_create(request)
+
+    def bulk_create(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError(['Ожидается список объектов.'])
+        if len(request.data) > self.max_batch_size:
+            raise ValidationError([
+                f'Не больше {self.max_batch_size} объектов за запрос.'
+            ])
+        serializer = self.get_serializer(data=request.data, many=True,
+                                         allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        objs = self.perform_bulk_create(serializer.validated_data)
+        return Response(self.get_serializer(objs, many=True).data,
+                        status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        serializer = BulkDeleteSerializer(data=request.data,
+                                          max_length=self.max_batch_size)
+        serializer.is_valid(raise_exception=True)
+        statuses = delete_owned(self.get_queryset(), request.user,
+                                serializer.validated_data['ids'])
+        return Response([{'id': pk, 'status': code}
+                         for pk, code in statuses.items()])
@@ -1,31 +1,240 @@
+from collections import OrderedDict, defaultdict
+
+from django.db.models import Prefetch
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+from posts.models import Post, Comment, Group, Follow, comments_count
+
+
+class ValuesSerializerMixin:
+    """Быстрое чтение без экземпляров моделей.
+
+    Строки берутся из values() вместе с полями связанных моделей, а
+    значения проходят через to_representation тех же полей сериализатора,
+    поэтому JSON совпадает с обычным до байта. Вложенный объект читается
+    из той же строки через JOIN, вложенный список – одним запросом на
+    все строки.
+    """
+
+    def value_converters(self, prefix=''):
+        model = self.Meta.model
+        converters = []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            source = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.ListSerializer):
+                # Место в ответе; список подставляет represent_values.
+                source = f'{prefix}pk'
+                convert = None
+            elif isinstance(field, serializers.BaseSerializer):
+                convert = None
+            elif isinstance(field, serializers.SlugRelatedField):
+                source = f'{source}__{field.slug_field}'
+                convert = None
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                convert = None
+            elif isinstance(field, serializers.FileField):
+                model_field = model._meta.get_field(field.source)
+                convert = (
+                    lambda value, field=field, model_field=model_field:
+                    field.to_representation(
+                        model_field.attr_class(None, model_field, value)
+                    )
+                )
+            else:
+                convert = field.to_representation
+            converters.append((name, source, convert))
+        return converters
+
+    def nested_fields(self):
+        return [(name, field) for name, field in self.fields.items()
+                if isinstance(field, serializers.BaseSerializer)]
+
+    def value_columns(self, prefix=''):
+        columns = [source for _, source, _ in self.value_converters(prefix)]
+        for _, field in self.nested_fields():
+            if not isinstance(field, serializers.ListSerializer):
+                columns.extend(
+                    field.value_columns(f'{prefix}{field.source}__')
+                )
+        return columns
+
+    def values(self, queryset, *extra):
+        """values() со столбцами для represent_values; extra – столбцы,
+        которые нужны еще кому-то, например пагинации."""
+        columns = [*self.value_columns(), 'pk', *extra]
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(columns)
+        )
+
+    def represent_values(self, rows, prefix=''):
+        converters = self.value_converters(prefix)
+        data = []
+        for row in rows:
+            item = OrderedDict()
+            for name, source, convert in converters:
+                value = row[source]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        for name, field in self.nested_fields():
+            if isinstance(field, serializers.ListSerializer):
+                self.represent_related(data, rows, name, field, prefix)
+                continue
+            source = prefix + field.source
+            nested = field.represent_values(rows, f'{source}__')
+            for item, row, value in zip(data, rows, nested):
+                item[name] = None if row[source] is None else value
+        return data
+
+    def represent_related(self, data, rows, name, field, prefix):
+        """Подставляет вложенный список (обратную связь) одним запросом
+        на все строки."""
+        relation = self.Meta.model._meta.get_field(field.source)
+        model = relation.related_model
+        parent = relation.field.name
+        related = list(field.child.values(
+            model._default_manager.filter(**{
+                f'{parent}__in': [row[f'{prefix}pk'] for row in rows]
+            }).order_by(*model._meta.ordering or ['pk']),
+            parent
+        ))
+        groups = defaultdict(list)
+        for row, value in zip(related, field.child.represent_values(related)):
+            groups[row[parent]].append(value)
+        for item, row in zip(data, rows):
+            item[name] = groups[row[f'{prefix}pk']]
 
 
-from posts.models import Post, Comment, Group, Follow
+class ExpandableSerializerMixin:
+    """Параметры ?fields= и ?expand= в ответах на чтение.
 
+    fields оставляет в ответе только перечисленные поля, expand добавляет
+    или заменяет поля из expandable_fields. setup_queryset переводит
+    выбранные поля в only(), select_related, prefetch_related и
+    аннотации из expand_annotations.
+    """
+    expandable_fields = {}
+    expand_annotations = {}
 
-class GroupSerializer(serializers.ModelSerializer):
+    def is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def query_names(self, request, param):
+        return [name.strip()
+                for name in request.query_params.get(param, '').split(',')
+                if name.strip()]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (request is None or request.method not in SAFE_METHODS
+                or not self.is_root()):
+            return fields
+        only = self.query_names(request, 'fields')
+        expand = self.query_names(request, 'expand')
+        errors = {}
+        unknown = set(only) - set(fields) - set(self.expandable_fields)
+        if unknown:
+            errors['fields'] = [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            ]
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            errors['expand'] = [
+                f'Нельзя раскрыть: {", ".join(sorted(unknown))}.'
+            ]
+        if errors:
+            raise ValidationError(errors)
+        if only:
+            fields = OrderedDict(
+                (name, field) for name, field in fields.items()
+                if name in only
+            )
+        for name in expand:
+            fields[name] = self.expandable_fields[name]()
+        return fields
+
+    def setup_queryset(self, queryset):
+        columns = []
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            if field.source in self.expand_annotations:
+                queryset = queryset.annotate(**{
+                    field.source: self.expand_annotations[field.source]()
+                })
+            elif isinstance(field, serializers.ListSerializer):
+                model = field.child.Meta.model
+                queryset = queryset.prefetch_related(Prefetch(
+                    field.source,
+                    queryset=model._default_manager.select_related(
+                        *related_sources(field.child)
+                    ).order_by(*model._meta.ordering or ['pk'])
+                ))
+            else:
+                columns.append(field.source.split('.')[0])
+        return queryset.only(*columns).select_related(
+            *related_sources(self)
+        )
+
+
+def related_sources(serializer, prefix=''):
+    """Связи, которые сериализатор читает у объекта, для select_related."""
+    related = []
+    for field in serializer.fields.values():
+        if field.write_only or isinstance(field, serializers.ListSerializer):
+            continue
+        source = prefix + field.source.split('.')[0]
+        if isinstance(field, serializers.SlugRelatedField):
+            related.append(source)
+        elif isinstance(field, serializers.BaseSerializer):
+            related.append(source)
+            related.extend(related_sources(field, f'{source}__'))
+    return related
+
+
+class GroupSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Group
         fields = '__all__'
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(ExpandableSerializerMixin, ValuesSerializerMixin,
+                     serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
+    expandable_fields = {
+        'group': lambda: GroupSerializer(read_only=True),
+        'comments_count': lambda: serializers.IntegerField(read_only=True),
+        'comments': lambda: CommentSerializer(many=True, read_only=True),
+    }
+    expand_annotations = {'comments_count': comments_count}
 
     class Meta:
         model = Post
-        fields = '__all__'
+        fields = ('id', 'author', 'text', 'pub_date', 'image', 'group')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ExpandableSerializerMixin, ValuesSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
+    expandable_fields = {
+        'post': lambda: PostSerializer(read_only=True),
+    }
 
     class Meta:
         model = Comment
@@ -46,3 +255,14 @@ class FollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = '__all__'
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
+
+    def __init__(self, *args, max_length=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['ids'].max_length = max_length
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import CachedTokenAuthentication, token_key
+from posts.models import User
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='blackemcee',
+                                            password='secret')
+
+    def setUp(self):
+        cache.clear()
+        self.token = Token.objects.create(user=self.user)
+
+    authentication = CachedTokenAuthentication()
+
+    def get(self, key):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return client.get('/api/v1/groups/')
+
+    def test_token_lookup_is_cached(self):
+        """
+        Проверка, что повторный запрос с тем же токеном не ходит в базу
+        за токеном и пользователем
+        """
+        self.assertEqual(self.get(self.token.key).status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.get(self.token.key)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_holds_no_secrets(self):
+        """
+        Проверка, что в кеше нет ни токена, ни хеша пароля, а пароль
+        пользователя из кеша дочитывается из базы
+        """
+        self.get(self.token.key)
+        cached = repr(cache.get(token_key(self.token.key)))
+        self.assertNotIn(self.token.key, cached)
+        self.assertNotIn(self.user.password, cached)
+        user, token = self.authentication.authenticate_credentials(
+            self.token.key)
+        self.assertEqual(token.key, self.token.key)
+        self.assertTrue(user.check_password('secret'))
+
+    def test_deleted_token_is_rejected(self):
+        """
+        Проверка, что удаленный токен сразу перестает работать
+        """
+        self.get(self.token.key)
+        self.token.delete()
+        self.assertEqual(self.get(self.token.key).status_code, 401)
+
+    def test_rotated_token_is_rejected(self):
+        """
+        Проверка, что после смены токена старый отклоняется, а новый
+        принимается
+        """
+        old_key = self.token.key
+        self.get(old_key)
+        self.token.delete()
+        new_token = Token.objects.create(user=self.user)
+        self.assertEqual(self.get(old_key).status_code, 401)
+        self.assertEqual(self.get(new_token.key).status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        Проверка, что токен деактивированного пользователя отклоняется
+        """
+        self.get(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(self.token.key).status_code, 401)
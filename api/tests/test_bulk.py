@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.views import PostViewSet
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.search import search_posts
+
+
+class BulkApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='blackemcee')
+        cls.other = User.objects.create(username='test')
+        cls.follower = User.objects.create(username='reader')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.authorized_client = APIClient()
+        cls.authorized_client.force_authenticate(cls.user)
+
+    def test_bulk_create_posts(self):
+        """
+        Проверка, что пачка постов создается с id, счетчиками, поиском
+        и лентами подписчиков
+        """
+        response = self.authorized_client.post('/api/v1/posts/bulk/', [
+            {'text': 'Пушкин'},
+            {'text': 'Онегин', 'group': self.group.pk},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        posts = Post.objects.filter(author=self.user).order_by('pk')
+        self.assertEqual(
+            [(item['id'], item['text'], item['author'], item['group'])
+             for item in response.data],
+            [(post.pk, post.text, 'blackemcee', post.group_id)
+             for post in posts]
+        )
+        self.assertEqual(self.user.stats.posts_count, 2)
+        self.assertEqual(
+            [post.pk for post in search_posts('онегин')[0:10]],
+            [posts[1].pk]
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 2
+        )
+
+    def test_invalid_item_rejects_whole_batch(self):
+        """
+        Проверка, что при ошибке в одном объекте ничего не сохраняется,
+        а ошибки возвращаются по каждому объекту
+        """
+        response = self.authorized_client.post('/api/v1/posts/bulk/', [
+            {'text': 'Пушкин'},
+            {'group': self.group.pk},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('text', response.data[1])
+        self.assertFalse(Post.objects.exists())
+
+    def test_batch_size_is_limited(self):
+        """
+        Проверка, что пачка больше лимита отклоняется
+        """
+        with mock.patch.object(PostViewSet, 'max_batch_size', 2):
+            response = self.authorized_client.post(
+                '/api/v1/posts/bulk/',
+                [{'text': f'Пушкин {i}'} for i in range(3)],
+                format='json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+    def test_bulk_create_requires_authentication(self):
+        """
+        Проверка, что гость не может создавать посты пачкой
+        """
+        response = APIClient().post('/api/v1/posts/bulk/',
+                                    [{'text': 'Пушкин'}], format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_bulk_delete_reports_status_per_id(self):
+        """
+        Проверка, что удаляются только свои посты, а для чужих и
+        несуществующих возвращается статус
+        """
+        own = Post.objects.create(text='Пушкин', author=self.user)
+        foreign = Post.objects.create(text='Онегин', author=self.other)
+        response = self.authorized_client.delete(
+            '/api/v1/posts/bulk/', {'ids': [own.pk, foreign.pk, 0]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {'id': own.pk, 'status': 204},
+            {'id': foreign.pk, 'status': 403},
+            {'id': 0, 'status': 404},
+        ])
+        self.assertEqual(list(Post.objects.all()), [foreign])
+
+    def test_bulk_create_comments(self):
+        """
+        Проверка, что пачка комментариев создается под нужным постом
+        """
+        post = Post.objects.create(text='Пушкин', author=self.other)
+        response = self.authorized_client.post(
+            f'/api/v1/posts/{post.pk}/comments/bulk/',
+            [{'text': f'Комментарий {i}'} for i in range(3)],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [item['id'] for item in response.data],
+            list(Comment.objects.filter(post=post).order_by(
+                'pk').values_list('pk', flat=True))
+        )
+        response = self.authorized_client.post(
+            '/api/v1/posts/0/comments/bulk/', [{'text': 'Комментарий'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 404)
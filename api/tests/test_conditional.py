@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.cache import now
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='blackemcee')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Пушкин', author=cls.user)
+        cls.reader = User.objects.create(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.guest_client = APIClient()
+        cls.urls = [
+            '/api/v1/posts/',
+            f'/api/v1/posts/{cls.post.pk}/',
+            f'/api/v1/posts/{cls.post.pk}/comments/',
+            '/api/v1/groups/',
+            f'/api/v1/groups/{cls.group.pk}/',
+            f'/api/v1/users/{cls.reader.pk}/follow/',
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_resource_is_not_modified(self):
+        """
+        Проверка, что список и объект с актуальным ETag отдаются как 304
+        без обращений к базе
+        """
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                # Last-Modified отдается, когда секунда изменения прошла.
+                with mock.patch('posts.cache.now',
+                                lambda: now() + 1000000):
+                    response = self.guest_client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """
+        Проверка, что комментарий и правка группы меняют ETag своих
+        ресурсов
+        """
+        comments = f'/api/v1/posts/{self.post.pk}/comments/'
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in (comments, '/api/v1/groups/')}
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Онегин')
+        self.group.title = 'Поэзия'
+        self.group.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_follow_changes_invalidate_etag(self):
+        """
+        Проверка, что новая подписка и смена имени автора меняют ETag
+        списка подписок
+        """
+        url = f'/api/v1/users/{self.reader.pk}/follow/'
+        etag = self.guest_client.get(url)['ETag']
+        author = User.objects.create(username='pushkin')
+        Follow.objects.create(user=self.reader, author=author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        author.username = 'alexander'
+        author.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'alexander')
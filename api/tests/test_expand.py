@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import viewsets
+from rest_framework.test import APIClient
+
+from api.views import CommentViewSet, PostViewSet
+from posts.models import Comment, Group, Post, User
+
+
+class ExpandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = APIClient()
+        author = User.objects.create(username='test')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        cls.post = Post.objects.create(text='Пушкин', author=author,
+                                       group=group, image='posts/small.gif')
+        Post.objects.bulk_create(
+            Post(text=f'Онегин {i}', author=User.objects.create(
+                username=f'user{i}')) for i in range(5)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text=f'Комментарий {i}')
+            for i in range(3)
+        )
+        cls.comment = Comment.objects.first()
+
+    def test_output_matches_model_serializer(self):
+        """
+        Проверка, что fields и expand на быстром пути дают тот же JSON,
+        что и ModelSerializer
+        """
+        post_url = f'/api/v1/posts/{self.post.pk}/'
+        cases = [
+            (PostViewSet, 'list', '/api/v1/posts/?fields=id,text'),
+            (PostViewSet, 'list',
+             '/api/v1/posts/?expand=group,comments_count,comments'),
+            (PostViewSet, 'retrieve',
+             f'{post_url}?fields=id&expand=comments,comments_count'),
+            (CommentViewSet, 'list', f'{post_url}comments/?fields=text'),
+            (CommentViewSet, 'retrieve',
+             f'{post_url}comments/{self.comment.pk}/?expand=post'),
+        ]
+        for viewset, action, url in cases:
+            with self.subTest(url=url):
+                fast = self.guest_client.get(url)
+                with mock.patch.object(viewset, action,
+                                       getattr(viewsets.ModelViewSet, action)):
+                    generic = self.guest_client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, generic.content)
+
+    def test_expanded_list_runs_two_queries(self):
+        """
+        Проверка, что список с группой, числом и списком комментариев
+        читается двумя запросами
+        """
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                '/api/v1/posts/?expand=group,comments_count,comments'
+            )
+        post = next(item for item in response.data['results']
+                    if item['id'] == self.post.pk)
+        self.assertEqual(post['group']['slug'], 'group')
+        self.assertEqual(post['comments_count'], 3)
+        self.assertEqual(len(post['comments']), 3)
+
+    def test_fields_limit_selected_columns(self):
+        """
+        Проверка, что fields убирает лишние столбцы из запроса
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get('/api/v1/posts/?fields=id')
+        self.assertEqual(list(response.data['results'][0]), ['id'])
+        self.assertNotIn('"text"', queries[0]['sql'])
+        self.assertNotIn('auth_user', queries[0]['sql'])
+
+    def test_unknown_names_are_rejected(self):
+        """
+        Проверка, что неизвестные fields и expand дают 400
+        """
+        for query in ('fields=password', 'expand=author'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(f'/api/v1/posts/?{query}')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,129 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Follow, Post, User
+
+
+class NestedViewSetQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='blackemcee')
+        cls.author = User.objects.create(username='test')
+        cls.post = Post.objects.create(text='Пушкин', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=User.objects.create(
+                username=f'reader{i}'), text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        cls.comment = Comment.objects.first()
+        for i in range(5):
+            Follow.objects.create(
+                user=cls.user,
+                author=User.objects.create(username=f'author{i}')
+            )
+        cls.follow = Follow.objects.first()
+        cls.guest_client = APIClient()
+        cls.authorized_client = APIClient()
+        cls.authorized_client.force_authenticate(cls.user)
+
+    def test_comment_list_is_one_query(self):
+        """
+        Проверка, что комментарии поста с авторами читаются одним
+        запросом
+        """
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                f'/api/v1/posts/{self.post.pk}/comments/')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_comment_retrieve_is_one_query(self):
+        """
+        Проверка, что комментарий читается одним запросом вместе с
+        проверкой поста
+        """
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                f'/api/v1/posts/{self.post.pk}/comments/{self.comment.pk}/')
+        self.assertEqual(response.data['author'], self.comment.author.username)
+
+    def test_comment_create_looks_up_post_once(self):
+        """
+        Проверка, что при создании комментария пост читается один раз
+        """
+        with self.assertNumQueries(2):
+            response = self.authorized_client.post(
+                f'/api/v1/posts/{self.post.pk}/comments/',
+                {'text': 'Онегин'}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_missing_parent_is_not_found(self):
+        """
+        Проверка, что у несуществующего поста и пользователя нет
+        вложенного списка
+        """
+        for url in ('/api/v1/posts/0/comments/',
+                    '/api/v1/users/0/follow/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest_client.get(url).status_code, 404)
+        response = self.authorized_client.post('/api/v1/posts/0/comments/',
+                                               {'text': 'Онегин'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_list_of_existing_parent(self):
+        """
+        Проверка, что пустой список существующего поста отдается с 200
+        """
+        post = Post.objects.create(text='Онегин', author=self.author)
+        response = self.guest_client.get(f'/api/v1/posts/{post.pk}/comments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_follow_list_is_one_query(self):
+        """
+        Проверка, что подписки с именами пользователей читаются одним
+        запросом
+        """
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                f'/api/v1/users/{self.user.pk}/follow/')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_follow_retrieve_is_one_query(self):
+        """
+        Проверка, что подписка читается одним запросом
+        """
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                f'/api/v1/users/{self.user.pk}/follow/{self.follow.pk}/')
+        self.assertEqual(response.data['author'],
+                         self.follow.author.username)
+
+    def test_follow_create_looks_up_author_once(self):
+        """
+        Проверка, что при подписке автор читается один раз
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.post(
+                f'/api/v1/users/{self.author.pk}/follow/')
+        self.assertEqual(response.status_code, 201)
+        lookups = [query for query in queries.captured_queries
+                   if query['sql'].startswith('SELECT')
+                   and 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(len(lookups), 1)
+
+    def test_follow_create_rejects_duplicate_and_self(self):
+        """
+        Проверка, что повторная подписка и подписка на себя дают 400
+        """
+        url = f'/api/v1/users/{self.author.pk}/follow/'
+        self.assertEqual(self.authorized_client.post(url).status_code, 201)
+        self.assertEqual(self.authorized_client.post(url).status_code, 400)
+        response = self.authorized_client.post(
+            f'/api/v1/users/{self.user.pk}/follow/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Follow.objects.filter(
+            user=self.user, author=self.user).exists())
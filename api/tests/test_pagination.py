@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.pagination import StableCursorPagination
+from posts.models import Post, User
+
+
+class PostPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.client = APIClient()
+        author = User.objects.create(username='test')
+        Post.objects.bulk_create(
+            Post(text='Пушкин' + str(i), author=author) for i in range(25)
+        )
+
+    def test_post_list_is_paginated(self):
+        """
+        Проверка, что список постов отдается страницами с курсором
+        """
+        response = PostPaginationTest.client.get('/api/v1/posts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+        next_page = PostPaginationTest.client.get(response.data['next'])
+        self.assertEqual(len(next_page.data['results']), 5)
+        ids = [post['id'] for post in
+               response.data['results'] + next_page.data['results']]
+        self.assertEqual(ids, list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True)))
+
+    def test_page_size_is_capped(self):
+        """
+        Проверка, что размер страницы задается параметром и ограничен
+        сверху
+        """
+        response = PostPaginationTest.client.get(
+            '/api/v1/posts/', {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        with mock.patch.object(StableCursorPagination, 'max_page_size', 5):
+            response = PostPaginationTest.client.get(
+                '/api/v1/posts/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 5)
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import viewsets
+from rest_framework.test import APIClient
+
+from api.views import CommentViewSet, PostViewSet
+from posts.models import Comment, Group, Post, User
+
+
+class ValuesSerializerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = APIClient()
+        author = User.objects.create(username='test')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        cls.post = Post.objects.create(text='Пушкин', author=author,
+                                       group=group, image='posts/small.gif')
+        Post.objects.bulk_create(
+            Post(text=f'Онегин {i}', author=User.objects.create(
+                username=f'user{i}')) for i in range(25)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        cls.comment = Comment.objects.first()
+
+    def assertSameAsModelSerializer(self, viewset, action, url):
+        fast = self.guest_client.get(url)
+        with mock.patch.object(viewset, action,
+                               getattr(viewsets.ModelViewSet, action)):
+            generic = self.guest_client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, generic.content)
+
+    def test_output_is_byte_identical(self):
+        """
+        Проверка, что быстрый путь отдает тот же JSON, что и
+        ModelSerializer
+        """
+        post_url = f'/api/v1/posts/{self.post.pk}/'
+        cases = [
+            (PostViewSet, 'list', '/api/v1/posts/'),
+            (PostViewSet, 'list', '/api/v1/posts/?page_size=5'),
+            (PostViewSet, 'retrieve', post_url),
+            (CommentViewSet, 'list', f'{post_url}comments/'),
+            (CommentViewSet, 'retrieve',
+             f'{post_url}comments/{self.comment.pk}/'),
+        ]
+        for viewset, action, url in cases:
+            with self.subTest(url=url):
+                self.assertSameAsModelSerializer(viewset, action, url)
+
+    def test_list_does_not_query_authors_per_row(self):
+        """
+        Проверка, что список постов читается одним запросом
+        """
+        with self.assertNumQueries(1):
+            response = self.guest_client.get('/api/v1/posts/')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_missing_post_is_not_found(self):
+        """
+        Проверка, что несуществующий пост отдает 404
+        """
+        response = self.guest_client.get('/api/v1/posts/0/')
+        self.assertEqual(response.status_code, 404)
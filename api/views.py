@@ -1,54 +1,103 @@
 from rest_framework import viewsets, permissions
-from django.shortcuts import get_object_or_404
-from posts.models import Post, Group, Follow, User
+from rest_framework.exceptions import ValidationError
+from posts.bulk import create_comments, create_posts
+from posts.models import Comment, Post, Group, Follow, User
+from .mixins import (BulkMixin, ConditionalMixin, ExpandableViewSetMixin,
+                     NestedViewSetMixin, ValuesReadMixin)
 from .serializers import PostSerializer, CommentSerializer, GroupSerializer, FollowSerializer
 from .permissions import IsOwnerOrReadOnly
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ConditionalMixin, viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
+    cursor_ordering = ('id',)
 
+    def get_scopes(self):
+        return ['groups']
 
-class PostViewSet(viewsets.ModelViewSet):
+
+class PostViewSet(ConditionalMixin, BulkMixin, ExpandableViewSetMixin,
+                  ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    cursor_ordering = ('-pub_date', '-id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsOwnerOrReadOnly]
 
+    def get_scopes(self):
+        if self.action == 'retrieve':
+            return [f'post:{self.kwargs["pk"]}']
+        return ['index']
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_bulk_create(self, items):
+        return create_posts(self.request.user, [
+            Post(author=self.request.user, **item) for item in items
+        ])
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ConditionalMixin, BulkMixin, ExpandableViewSetMixin,
+                     NestedViewSetMixin, ValuesReadMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    cursor_ordering = ('created', 'id')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsOwnerOrReadOnly]
+    parent_model = Post
+    parent_kwarg = 'post_id'
+
+    def get_scopes(self):
+        return [f'post:{self.kwargs["post_id"]}']
 
     def perform_create(self, serializer):
-        post = get_object_or_404(Post, id=self.kwargs.get('post_id'))
+        post = self.get_parent(Post.objects.select_related('author', 'group'))
         serializer.save(
             author=self.request.user,
             post=post
         )
 
+    def perform_bulk_create(self, items):
+        post = self.get_parent(Post.objects.select_related('author', 'group'))
+        return create_comments(post, self.request.user, [
+            Comment(post=post, author=self.request.user, **item)
+            for item in items
+        ])
+
     def get_queryset(self):
-        post = get_object_or_404(Post, id=self.kwargs.get('post_id'))
-        return post.comments
+        return Comment.objects.filter(
+            post_id=self.kwargs.get('post_id')
+        ).select_related('author')
 
 
-class FollowViewSet(viewsets.ModelViewSet):
+class FollowViewSet(ConditionalMixin, NestedViewSetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = FollowSerializer
+    cursor_ordering = ('id',)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsOwnerOrReadOnly]
+    parent_model = User
+    parent_kwarg = 'user_id'
+
+    def get_scopes(self):
+        return [f'follow:{self.kwargs["user_id"]}']
 
     def perform_create(self, serializer):
-        author = get_object_or_404(User, id=self.kwargs.get('user_id'))
-        serializer.save(
-            user=self.request.user,
-            author=author
-        )
+        author = self.get_parent()
+        if author == self.request.user:
+            raise ValidationError(
+                {'author': ['Нельзя подписаться на самого себя.']}
+            )
+        follow = Follow.objects.follow(self.request.user, author)
+        if follow is None:
+            raise ValidationError(
+                {'author': ['Вы уже подписаны на этого автора.']}
+            )
+        serializer.instance = follow
 
     def get_queryset(self):
-        user = get_object_or_404(User, id=self.kwargs.get('user_id'))
-        return user.follower
+        return Follow.objects.filter(
+            user_id=self.kwargs.get('user_id')
+        ).select_related('user', 'author')
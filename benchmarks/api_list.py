@@ -0,0 +1,63 @@
+"""Время ответа и память для GET /api/v1/posts/ с пагинацией и без нее.
+
+    python -m benchmarks.api_list --posts 100000
+"""
+import resource
+import tracemalloc
+
+from benchmarks.utils import benchmark_database, get_parser, report, timings
+
+
+def seed(count, batch_size=10000):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+
+    author = get_user_model().objects.create(username='benchmark')
+    for start in range(0, count, batch_size):
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {number}', author=author)
+            for number in range(start, min(start + batch_size, count))
+        )
+
+
+def measure(client, repeat):
+    def get():
+        response = client.get('/api/v1/posts/')
+        assert response.status_code == 200, response.status_code
+
+    result = timings(get, repeat)
+    tracemalloc.start()
+    get()
+    result['peak_alloc_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+    tracemalloc.stop()
+    result['max_rss_kb'] = resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with benchmark_database(args.db, args.keep) as reused:
+        from rest_framework.test import APIClient
+
+        from api.views import PostViewSet
+
+        if not reused:
+            seed(args.posts)
+        client = APIClient()
+        results = {
+            'posts': args.posts,
+            'cursor_pagination': measure(client, args.repeat),
+        }
+        PostViewSet.pagination_class = None
+        results['no_pagination'] = measure(client, max(args.repeat // 10, 1))
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Пропускная способность импорта через API: по одному объекту за запрос
+против пачек через .../bulk/.
+
+    python -m benchmarks.bulk_api --items 2000 --batch 100 --batch 500
+"""
+import time
+
+from benchmarks.utils import benchmark_database, get_parser, report
+
+
+def throughput(send, items, batch):
+    start = time.perf_counter()
+    for offset in range(0, items, batch):
+        send(min(batch, items - offset), offset)
+    seconds = time.perf_counter() - start
+    return {'seconds': round(seconds, 3),
+            'items_per_s': round(items / seconds)}
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--batch', type=int, action='append',
+                        help='размер пачки, можно несколько раз')
+    args = parser.parse_args()
+    batches = args.batch or [100, 500]
+
+    from django.conf import settings
+
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    with benchmark_database(args.db, args.keep):
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from posts.models import Follow, Post, User
+
+        author, _ = User.objects.get_or_create(username='benchmark')
+        User.objects.bulk_create(
+            User(username=f'follower{number}') for number in range(50)
+        )
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in User.objects.exclude(pk=author.pk)
+        )
+        post = Post.objects.create(text='Пост', author=author)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=author)}'
+        )
+
+        def single(url):
+            def send(count, offset):
+                for number in range(offset, offset + count):
+                    response = client.post(
+                        url, {'text': f'Текст {number}'}, format='json'
+                    )
+                    assert response.status_code == 201, response.data
+            return send
+
+        def bulk(url):
+            def send(count, offset):
+                response = client.post(url, [
+                    {'text': f'Текст {number}'}
+                    for number in range(offset, offset + count)
+                ], format='json')
+                assert response.status_code == 201, response.data
+            return send
+
+        results = {'items': args.items}
+        for name, url in (
+                ('posts', '/api/v1/posts/'),
+                ('comments', f'/api/v1/posts/{post.pk}/comments/')):
+            results[name] = {
+                'single': throughput(single(url), args.items, 1),
+            }
+            for batch in batches:
+                results[name][f'bulk_{batch}'] = throughput(
+                    bulk(f'{url}bulk/'), args.items, batch
+                )
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Доля попаданий и задержка кеша страниц при нескольких процессах.
+
+Каждый процесс изображает воркер: читает страницы с популярностью по
+закону Ципфа, а при промахе «рендерит» страницу и кладет ее в кеш.
+
+    python -m benchmarks.cache --workers 4 --requests 5000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.utils import percentile, report
+
+BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', {}),
+    'sqlite': ('yatube.cache.SQLiteCache', {}),
+    'sqlite_l1': ('yatube.cache.SQLiteCache', {'L1_TIMEOUT': 1}),
+}
+
+
+def create_backend(name, location, max_entries):
+    from django.utils.module_loading import import_string
+
+    path, options = BACKENDS[name]
+    return import_string(path)(location, {
+        'OPTIONS': dict(options, MAX_ENTRIES=max_entries),
+    })
+
+
+def work(name, location, args, seed):
+    backend = create_backend(name, location, args.max_entries)
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, args.pages + 1)]
+    page = 'x' * args.page_size
+    samples = []
+    hits = 0
+    for key in rng.choices(range(args.pages), weights, k=args.requests):
+        start = time.perf_counter()
+        if backend.get(f'page:{key}') is None:
+            time.sleep(args.render_ms / 1000)
+            backend.set(f'page:{key}', page)
+        else:
+            hits += 1
+        samples.append((time.perf_counter() - start) * 1000)
+    return hits, samples
+
+
+def measure(name, args):
+    location = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.starmap(work, [
+            (name, location, args, seed) for seed in range(args.workers)
+        ])
+    samples = [sample for _, worker in results for sample in worker]
+    return {
+        'hit_rate': round(sum(hits for hits, _ in results) / len(samples), 3),
+        'p50_ms': round(percentile(samples, 0.5), 3),
+        'p95_ms': round(percentile(samples, 0.95), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='запросов на один процесс')
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--page-size', type=int, default=20000,
+                        help='размер страницы в байтах')
+    parser.add_argument('--render-ms', type=float, default=5)
+    parser.add_argument('--max-entries', type=int, default=10000)
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    results = {'workers': args.workers}
+    for name in BACKENDS:
+        results[name] = measure(name, args)
+    report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
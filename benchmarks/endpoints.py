@@ -0,0 +1,229 @@
+r"""Задержка, число SQL-запросов и память для страниц и API.
+
+Заполняет базу командой seed_data, прогоняет каждую страницу и каждый
+эндпоинт /api/v1/ через тестовый клиент Django и сохраняет результаты в
+JSON. С --compare сравнивает прогон с сохраненным и завершается с кодом 1,
+если что-то стало заметно медленнее или делает больше запросов.
+
+    python -m benchmarks.endpoints --users 1000 --posts 50000 --output new.json
+    python -m benchmarks.endpoints --db /tmp/e.sqlite3 --keep \
+        --compare new.json
+"""
+import io
+import json
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.utils import benchmark_database, get_parser, report, timings
+
+PASSWORD = 'benchmark-password'
+USERNAME = 'user0'
+
+
+def seed(args):
+    from django.core.management import call_command
+
+    from posts.models import User
+
+    call_command(
+        'seed_data', users=args.users, groups=args.groups, posts=args.posts,
+        comments=args.comments, follows=args.follows, images=args.images,
+        seed=args.seed, workers=args.workers, stdout=io.StringIO()
+    )
+    user = User.objects.get(username=USERNAME)
+    user.set_password(PASSWORD)
+    user.save()
+
+
+def targets():
+    """Пары (имя, клиент, метод, адрес, данные) для всех страниц и API.
+
+    Адрес может быть функцией: ее вызывают перед каждым запросом вне
+    замера, чтобы, например, удалять каждый раз новую запись.
+    """
+    from django.urls import reverse
+
+    from posts.models import Comment, Follow, Group, Post, User
+
+    user = User.objects.get(username=USERNAME)
+    post = Post.objects.filter(comments__isnull=False).select_related(
+        'author', 'group').first()
+    comment = Comment.objects.filter(post=post).first()
+    group = Group.objects.first()
+    author = Follow.objects.filter(user=user).first().author
+    own_post = Post.objects.filter(author=user).first()
+    if own_post is None:
+        own_post = Post.objects.create(text='Свой пост', author=user)
+    own_comment = Comment.objects.filter(post=post, author=user).first()
+    if own_comment is None:
+        own_comment = Comment.objects.create(text='Свой комментарий',
+                                             post=post, author=user)
+    api = '/api/v1'
+
+    def new_post():
+        fresh = Post.objects.create(text='Пост на удаление', author=user)
+        return f'{api}/posts/{fresh.pk}/'
+
+    def new_comment():
+        fresh = Comment.objects.create(text='Комментарий на удаление',
+                                       post=post, author=user)
+        return f'{api}/posts/{post.pk}/comments/{fresh.pk}/'
+
+    def unfollowed_author():
+        Follow.objects.unfollow(user, author)
+        return f'{api}/users/{author.pk}/follow/'
+
+    return [
+        ('index', 'guest', 'get', reverse('index'), None),
+        ('index', 'user', 'get', reverse('index'), None),
+        ('group_posts', 'user', 'get',
+         reverse('groups', args=[group.slug]), None),
+        ('profile', 'user', 'get',
+         reverse('profile', args=[author.username]), None),
+        ('post_view', 'user', 'get',
+         reverse('post', args=[post.author.username, post.pk]), None),
+        ('follow_index', 'user', 'get', reverse('follow_index'), None),
+        ('search_results', 'user', 'get',
+         reverse('search_results') + '?q=онегин', None),
+        ('api_token_auth', 'guest', 'post', f'{api}/api_token_auth/',
+         {'username': USERNAME, 'password': PASSWORD}),
+        ('posts-list', 'api', 'get', f'{api}/posts/', None),
+        ('posts-detail', 'api', 'get', f'{api}/posts/{post.pk}/', None),
+        ('posts-create', 'api', 'post', f'{api}/posts/',
+         {'text': 'Новый пост'}),
+        ('posts-update', 'api', 'put', f'{api}/posts/{own_post.pk}/',
+         {'text': 'Измененный пост'}),
+        ('posts-partial_update', 'api', 'patch',
+         f'{api}/posts/{own_post.pk}/', {'text': 'Исправленный пост'}),
+        ('posts-destroy', 'api', 'delete', new_post, None),
+        ('comments-list', 'api', 'get',
+         f'{api}/posts/{post.pk}/comments/', None),
+        ('comments-detail', 'api', 'get',
+         f'{api}/posts/{post.pk}/comments/{comment.pk}/', None),
+        ('comments-create', 'api', 'post',
+         f'{api}/posts/{post.pk}/comments/', {'text': 'Комментарий'}),
+        ('comments-update', 'api', 'put',
+         f'{api}/posts/{post.pk}/comments/{own_comment.pk}/',
+         {'text': 'Измененный комментарий'}),
+        ('comments-partial_update', 'api', 'patch',
+         f'{api}/posts/{post.pk}/comments/{own_comment.pk}/',
+         {'text': 'Исправленный комментарий'}),
+        ('comments-destroy', 'api', 'delete', new_comment, None),
+        ('groups-list', 'api', 'get', f'{api}/groups/', None),
+        ('groups-detail', 'api', 'get', f'{api}/groups/{group.pk}/', None),
+        ('follow-list', 'api', 'get', f'{api}/users/{user.pk}/follow/',
+         None),
+        ('follow-create', 'api', 'post', unfollowed_author, None),
+    ]
+
+
+def measure(client, method, url, data, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def prepare():
+        return url() if callable(url) else url
+
+    def request(target):
+        response = getattr(client, method)(target, data)
+        assert response.status_code < 400, (target, response.status_code)
+
+    result = timings(request, repeat, prepare)
+    target = prepare()
+    with CaptureQueriesContext(connection) as queries:
+        request(target)
+    result['queries'] = len(queries)
+    target = prepare()
+    tracemalloc.start()
+    request(target)
+    result['peak_alloc_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+    tracemalloc.stop()
+    return result
+
+
+def compare(results, previous, threshold):
+    regressions = []
+    for name, result in results['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        if result['p50_ms'] > before['p50_ms'] * threshold:
+            regressions.append(
+                f'{name}: p50 {before["p50_ms"]} -> {result["p50_ms"]} мс'
+            )
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: запросов {before["queries"]} -> '
+                f'{result["queries"]}'
+            )
+    return regressions
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--follows', type=int, default=20,
+                        help='подписок на пользователя в среднем')
+    parser.add_argument('--images', type=float, default=0.2,
+                        help='доля записей с картинкой')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='процессов для заполнения базы')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--compare', help='JSON предыдущего прогона')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='во сколько раз p50 может вырасти')
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    media = tempfile.mkdtemp()
+    settings.MEDIA_ROOT = media
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.SLOW_REQUEST_MS = float('inf')
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    try:
+        with benchmark_database(args.db, args.keep) as reused:
+            from django.test import Client
+            from rest_framework.test import APIClient
+
+            from posts.models import Post, User
+
+            if not reused:
+                seed(args)
+            user = User.objects.get(username=USERNAME)
+            clients = {'guest': Client(), 'user': Client(),
+                       'api': APIClient()}
+            clients['user'].force_login(user)
+            clients['api'].force_authenticate(user)
+            results = {
+                'posts': Post.objects.count(),
+                'users': User.objects.count(),
+                'endpoints': {},
+            }
+            for name, client, method, url, data in targets():
+                results['endpoints'][f'{name} ({client})'] = measure(
+                    clients[client], method, url, data, args.repeat
+                )
+            report(results, args.output)
+    finally:
+        shutil.rmtree(media, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print(line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
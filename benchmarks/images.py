@@ -0,0 +1,62 @@
+"""Время кодирования и размер файла для каждого варианта картинки записи.
+
+    python -m benchmarks.images --source photo.jpg
+"""
+import argparse
+import io
+
+import django
+
+from benchmarks.utils import report, timings
+
+
+def synthetic_image(width, height):
+    from PIL import Image, ImageFilter
+
+    noise = Image.effect_noise((width, height), 64).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((width, height)).convert(
+        'RGB')
+    return Image.blend(noise, gradient, 0.6).filter(ImageFilter.SMOOTH)
+
+
+def encode(image, geometry, image_format, quality):
+    from PIL import Image, ImageOps
+
+    width, height = (int(value) for value in geometry.split('x'))
+    resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, format=image_format, quality=quality)
+    return buffer.getbuffer().nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', help='картинка для нарезки; по '
+                                         'умолчанию синтетическая 3000x2000')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    django.setup()
+    from PIL import Image
+    from sorl.thumbnail.conf import settings as thumbnail_settings
+
+    from posts.thumbnails import SIZES
+
+    image = (Image.open(args.source).convert('RGB') if args.source
+             else synthetic_image(3000, 2000))
+    quality = thumbnail_settings.THUMBNAIL_QUALITY
+    results = {'source': f'{image.width}x{image.height}', 'variants': {}}
+    for geometry, options in SIZES:
+        image_format = options['format']
+        result = timings(
+            lambda: encode(image, geometry, image_format, quality),
+            args.repeat
+        )
+        result['bytes'] = encode(image, geometry, image_format, quality)
+        results['variants'][f'{geometry} {image_format}'] = result
+    report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Сравнение полнотекстового поиска с LIKE-сканированием.
+
+    python -m benchmarks.search --posts 1000000 --db /tmp/search.sqlite3 --keep
+"""
+import random
+
+from benchmarks.utils import benchmark_database, get_parser, report, timings
+
+WORDS = (
+    'пушкин онегин татьяна ленский дуэль бал письмо деревня осень зима '
+    'петербург москва роман поэма стих перо чернила дядя правила уважать '
+    'заставил лучше выдумать пример другим наука боже скука больной сидеть'
+).split()
+
+
+def seed(count, batch_size=10000):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+    from posts.search import get_backend
+
+    author = get_user_model().objects.create(username='benchmark')
+    rnd = random.Random(0)
+    for start in range(0, count, batch_size):
+        Post.objects.bulk_create(
+            Post(
+                text=' '.join(rnd.choices(WORDS, k=rnd.randint(10, 60))),
+                author=author
+            )
+            for _ in range(min(batch_size, count - start))
+        )
+    get_backend().rebuild()
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with benchmark_database(args.db, args.keep) as reused:
+        from django.core.paginator import Paginator
+
+        from posts.models import Post
+        from posts.search import search_posts
+
+        if not reused:
+            seed(args.posts)
+
+        def like_scan(query):
+            return lambda: list(
+                Post.objects.select_related('author').filter(
+                    text__contains=query
+                )
+            )
+
+        def fts_page(query):
+            return lambda: list(
+                Paginator(search_posts(query), 10).get_page(1)
+            )
+
+        results = {'posts': Post.objects.count(), 'queries': {}}
+        for query in ('онегин', 'дуэль осень', 'боже скука больной'):
+            results['queries'][query] = {
+                'like': timings(like_scan(query), args.repeat),
+                'fts': timings(fts_page(query), args.repeat),
+            }
+        report(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
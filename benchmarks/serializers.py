@@ -0,0 +1,96 @@
+"""Пропускная способность сериализации постов и комментариев, строк в секунду.
+
+Сравнивает ModelSerializer (как есть и с select_related) с быстрым путем
+через values(). Время включает запрос к базе и отрисовку JSON.
+
+    python -m benchmarks.serializers --posts 20000 --rows 1000
+"""
+from benchmarks.utils import benchmark_database, get_parser, report, timings
+
+
+def seed(count, batch_size=10000):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Comment, Post
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'benchmark{number}') for number in range(100)
+    )
+    users = list(User.objects.all())
+    for start in range(0, count, batch_size):
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {number}',
+                 author=users[number % len(users)],
+                 image='posts/benchmark.jpg' if number % 5 == 0 else None)
+            for number in range(start, min(start + batch_size, count))
+        )
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=users[number % len(users)],
+                text=f'Комментарий {number}')
+        for number in range(count)
+    )
+
+
+def throughput(func, rows, repeat):
+    result = timings(func, repeat)
+    result['rows_per_s'] = round(rows / result['p50_ms'] * 1000)
+    return result
+
+
+def measure(serializer_class, queryset, rows, repeat, request):
+    from rest_framework.renderers import JSONRenderer
+
+    context = {'request': request}
+    renderer = JSONRenderer()
+
+    def model(queryset):
+        return lambda: renderer.render(serializer_class(
+            queryset[:rows], many=True, context=context
+        ).data)
+
+    def values():
+        serializer = serializer_class(context=context)
+        renderer.render(serializer.represent_values(
+            serializer.values(queryset)[:rows]
+        ))
+
+    return {
+        'model_serializer': throughput(model(queryset), rows, repeat),
+        'select_related': throughput(
+            model(queryset.select_related('author')), rows, repeat
+        ),
+        'values': throughput(values, rows, repeat),
+    }
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with benchmark_database(args.db, args.keep) as reused:
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from api.serializers import CommentSerializer, PostSerializer
+        from posts.models import Comment, Post
+
+        if not reused:
+            seed(args.posts)
+        request = Request(APIRequestFactory().get('/api/v1/posts/'))
+        report({
+            'rows': args.rows,
+            'posts': measure(PostSerializer, Post.objects.order_by('-id'),
+                             args.rows, args.repeat, request),
+            'comments': measure(CommentSerializer,
+                                Comment.objects.order_by('id'),
+                                args.rows, args.repeat, request),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
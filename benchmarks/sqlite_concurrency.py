@@ -0,0 +1,131 @@
+"""Пропускная способность SQLite при одновременных чтениях и записях.
+
+Процессы-читатели открывают ленту, процессы-писатели добавляют
+комментарии. Прогон повторяется с настройками SQLite по умолчанию и с
+PRAGMAS из settings.
+
+    python -m benchmarks.sqlite_concurrency --readers 4 --writers 2
+"""
+import multiprocessing
+import time
+
+from benchmarks.utils import (benchmark_database, get_parser, percentile,
+                              report)
+
+DEFAULTS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': 5000,
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+
+def seed(posts):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Post
+
+    author = get_user_model().objects.create(username='benchmark')
+    Post.objects.bulk_create(
+        Post(text=f'Тестовый пост {number}', author=author)
+        for number in range(posts)
+    )
+
+
+def work(role, pragmas, duration, queue):
+    from django.db import OperationalError, connection
+
+    from posts.models import Comment, Post, User
+
+    connection.close()
+    connection.settings_dict['PRAGMAS'] = pragmas
+    author = User.objects.get(username='benchmark')
+    post_ids = list(Post.objects.values_list('pk', flat=True)[:100])
+    samples = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'reader':
+                list(Post.objects.for_feed()[:10])
+            else:
+                Comment.objects.create(
+                    post_id=post_ids[len(samples) % len(post_ids)],
+                    author=author,
+                    text='Комментарий'
+                )
+        except OperationalError:
+            errors += 1
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+    connection.close()
+    queue.put((role, samples, errors))
+
+
+def measure(pragmas, args):
+    from django.db import connection
+
+    connection.settings_dict['PRAGMAS'] = pragmas
+    connection.close()
+    connection.ensure_connection()
+    connection.close()
+    queue = multiprocessing.Queue()
+    roles = ['reader'] * args.readers + ['writer'] * args.writers
+    workers = [
+        multiprocessing.Process(
+            target=work, args=(role, pragmas, args.duration, queue)
+        )
+        for role in roles
+    ]
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    summary = {}
+    for role in ('reader', 'writer'):
+        samples = [sample for kind, values, _ in results if kind == role
+                   for sample in values]
+        summary[f'{role}s'] = {
+            'ops_per_s': round(len(samples) / args.duration, 1),
+            'p95_ms': round(percentile(samples, 0.95), 3),
+            'locked_errors': sum(errors for kind, _, errors in results
+                                 if kind == role),
+        }
+    return summary
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5,
+                        help='секунд на один прогон')
+    args = parser.parse_args()
+
+    from django.conf import settings
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}
+    with benchmark_database(args.db, args.keep) as reused:
+        from yatube.db.base import DEFAULT_PRAGMAS
+
+        if not reused:
+            seed(args.posts)
+        tuned = dict(DEFAULT_PRAGMAS)
+        tuned.update(settings.DATABASES['default'].get('PRAGMAS') or {})
+        report({
+            'readers': args.readers,
+            'writers': args.writers,
+            'defaults': measure(DEFAULTS, args),
+            'tuned': measure(tuned, args),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Накладные расходы аутентификации по токену на один запрос API.
+
+Сравнивает TokenAuthentication из DRF с CachedTokenAuthentication: время
+authenticate() и число SQL-запросов.
+
+    python -m benchmarks.token_auth --repeat 2000
+"""
+from benchmarks.utils import benchmark_database, get_parser, report, timings
+
+
+def measure(authentication, request, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def authenticate():
+        user, _ = authentication.authenticate(request)
+        assert user.is_authenticated
+
+    authenticate()
+    result = timings(authenticate, repeat)
+    with CaptureQueriesContext(connection) as queries:
+        authenticate()
+    result['queries'] = len(queries)
+    return result
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    with benchmark_database(args.db, args.keep):
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from rest_framework.authentication import TokenAuthentication
+        from rest_framework.authtoken.models import Token
+        from rest_framework.request import Request
+
+        from api.authentication import CachedTokenAuthentication
+        from posts.models import User
+
+        user, _ = User.objects.get_or_create(username='benchmark')
+        token, _ = Token.objects.get_or_create(user=user)
+        cache.clear()
+        request = Request(RequestFactory().get(
+            '/api/v1/posts/', HTTP_AUTHORIZATION=f'Token {token.key}'
+        ))
+        report({
+            'token': measure(TokenAuthentication(), request, args.repeat),
+            'cached_token': measure(CachedTokenAuthentication(), request,
+                                    args.repeat),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+def get_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--db',
+        help='файл SQLite для данных бенчмарка; с --keep переиспользуется'
+    )
+    parser.add_argument('--keep', action='store_true',
+                        help='не удалять базу после прогона')
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    return parser
+
+
+@contextmanager
+def benchmark_database(path=None, keep=False):
+    """Поднимает Django на отдельной базе и отдельном кеше, не трогая
+    db.sqlite3 и cache.sqlite3."""
+    import django
+    from django.conf import settings
+
+    path = path or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    settings.DATABASES['default']['TEST'] = {'NAME': path}
+    cache_directory = tempfile.mkdtemp()
+    settings.CACHES['default']['LOCATION'] = os.path.join(
+        cache_directory, 'cache.sqlite3'
+    )
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    exists = keep and os.path.exists(path)
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False, keepdb=exists
+    )
+    try:
+        yield exists
+    finally:
+        if keep:
+            connection.close()
+        else:
+            connection.creation.destroy_test_db(path, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(cache_directory, ignore_errors=True)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def timings(func, repeat, prepare=None):
+    """Замеряет func; если задан prepare, его результат передается в func,
+    а время подготовки в замер не входит."""
+    samples = []
+    for _ in range(repeat):
+        args = (prepare(),) if prepare else ()
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(percentile(samples, 0.5), 3),
+        'p95_ms': round(percentile(samples, 0.95), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def report(results, output=None):
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    print(text)
+    if output:
+        with open(output, 'w') as file:
+            file.write(text + '\n')
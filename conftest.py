@@ -0,0 +1,9 @@
+import pytest
+
+from yatube.test_runner import isolated_cache
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _isolated_cache():
+    with isolated_cache():
+        yield
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment
+from .models import Post, Group, Comment, UserStats
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -24,6 +24,13 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'posts_count', 'followers_count',
+                    'following_count')
+    search_fields = ('user__username',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(UserStats, UserStatsAdmin)
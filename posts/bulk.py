@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from . import cache, timeline
+from .models import Comment, Post, UserStats
+from .search import get_backend
+
+
+def assign_pks(objs, queryset):
+    """Проставляет pk объектам после bulk_create там, где база их не
+    возвращает (SQLite). Вызывается в той же транзакции, что и вставка:
+    она держит блокировку записи, поэтому последние len(objs) строк
+    queryset – это именно эти объекты."""
+    if not objs or objs[0].pk is not None:
+        return
+    pks = list(queryset.order_by('-pk').values_list(
+        'pk', flat=True)[:len(objs)])
+    for obj, pk in zip(objs, reversed(pks)):
+        obj.pk = pk
+
+
+def create_posts(author, posts):
+    """Вставляет записи автора одним bulk_create и делает то же, что
+    обработчики post_save, но по разу на пачку."""
+    with transaction.atomic():
+        Post.objects.bulk_create(posts)
+        assign_pks(posts, Post.objects.filter(author=author))
+        UserStats.objects.change(author.pk, posts_count=len(posts))
+        get_backend().index_many(posts)
+        timeline.fan_out_many(posts)
+        cache.invalidate(*{
+            scope for post in posts for scope in cache.post_scopes(post)
+        })
+    return posts
+
+
+def create_comments(post, author, comments):
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        assign_pks(comments, Comment.objects.filter(post=post, author=author))
+        cache.invalidate(*cache.post_scopes(post))
+    return comments
+
+
+def delete_owned(queryset, user, ids):
+    """Удаляет объекты из ids, принадлежащие user. Возвращает статус для
+    каждого id: 204, 403 или 404."""
+    owners = dict(queryset.filter(pk__in=ids).values_list('pk', 'author_id'))
+    statuses = {}
+    for pk in ids:
+        if pk not in owners:
+            statuses[pk] = 404
+        elif owners[pk] != user.pk:
+            statuses[pk] = 403
+        else:
+            statuses[pk] = 204
+    owned = [pk for pk, status in statuses.items() if status == 204]
+    if owned:
+        with transaction.atomic():
+            queryset.filter(pk__in=owned).delete()
+    return statuses
@@ -0,0 +1,227 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from yatube.counters import Counters
+
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 15)
+PAGE_PREFIX = 'posts:page'
+VERSION_PREFIX = 'posts:version'
+
+# Попадания и промахи копятся в процессе, чтобы не писать в общий кеш на
+# каждый запрос.
+counters = Counters(PAGE_PREFIX)
+
+
+def now():
+    return int(time.time() * 1000000)
+
+
+def version_key(scope):
+    return f'{VERSION_PREFIX}:{scope}'
+
+
+def get_versions(scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: now() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Новая версия области – время изменения в микросекундах, но всегда
+    больше прежней, поэтому по версиям можно отдавать Last-Modified."""
+    keys = [version_key(scope) for scope in set(scopes)]
+    current = now()
+    versions = cache.get_many(keys)
+    cache.set_many(
+        {key: max(current, versions.get(key, 0) + 1) for key in keys}, None
+    )
+
+
+def invalidate(*scopes):
+    """Сбрасывает страницы сразу и еще раз после коммита транзакции,
+    чтобы не закешировать состояние до коммита."""
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def count(name):
+    counters.count(name)
+    counters.flush()
+
+
+def stats():
+    return counters.get(['hits', 'misses'])
+
+
+def page_key(request, scopes):
+    versions = get_versions(scopes)
+    digest = hashlib.md5(
+        '|'.join(
+            [request.get_full_path()] + [str(v) for v in versions]
+        ).encode()
+    ).hexdigest()
+    return f'{PAGE_PREFIX}:{digest}'
+
+
+def cache_anonymous_page(scopes):
+    """Кеширует страницу для анонимных пользователей.
+
+    scopes получает аргументы view и возвращает области, от версий
+    которых зависит страница.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = page_key(request, scopes(*args, **kwargs))
+            response = cache.get(key)
+            if response is not None:
+                count('hits')
+                return response
+            count('misses')
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.cookies
+                    and not request.META.get('CSRF_COOKIE_USED')):
+                cache.set(key, response, PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def validators(scopes, *extra):
+    """ETag и время последнего изменения (timestamp) страницы по версиям
+    ее областей; extra – то, от чего еще зависит ответ.
+
+    Last-Modified точен до секунды, а версии – до микросекунды: пока идет
+    секунда последнего изменения, в ту же секунду может прийти еще одно,
+    и If-Modified-Since его не заметит. Поэтому до конца этой секунды
+    время изменения не отдается и остается только ETag.
+    """
+    versions = get_versions(scopes)
+    etag = hashlib.md5(
+        '|'.join(str(part) for part in (*extra, *versions)).encode()
+    ).hexdigest()
+    last_modified = max(versions) // 1000000
+    if last_modified >= now() // 1000000:
+        last_modified = None
+    return quote_etag(etag), last_modified
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """Отвечает 304 без вызова get_response, если клиент прислал
+    актуальные If-None-Match или If-Modified-Since, иначе добавляет
+    валидаторы к ответу."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return response
+    response = get_response()
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_page(scopes):
+    """Добавляет к странице ETag и Last-Modified по версиям областей и
+    отвечает на условные GET без вызова view.
+
+    scopes получает запрос и аргументы view. Для авторизованных
+    пользователей страница своя у каждого, поэтому ETag включает
+    пользователя, а Last-Modified не отдается.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            return conditional_page_response(
+                request, scopes(request, *args, **kwargs),
+                lambda: view(request, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def conditional_page_response(request, scopes, get_response):
+    # Страница может содержать форму с CSRF-токеном, а его секрет
+    # меняется при входе.
+    etag, last_modified = validators(
+        scopes, request.user.pk, request.user.get_username(),
+        request.META.get('CSRF_COOKIE')
+    )
+    if request.user.is_authenticated:
+        last_modified = None
+    return conditional_response(request, etag, last_modified, get_response)
+
+
+def post_scopes(post):
+    scopes = ['index', f'post:{post.pk}']
+    try:
+        scopes.append(f'author:{post.author.username}')
+        if post.group_id:
+            scopes.append(f'group:{post.group.slug}')
+    except ObjectDoesNotExist:
+        pass
+    return scopes
+
+
+def invalidate_post(post):
+    invalidate(*post_scopes(post), *getattr(post, '_stored_scopes', ()))
+
+
+def invalidate_comment(comment):
+    try:
+        invalidate(*post_scopes(comment.post))
+    except ObjectDoesNotExist:
+        pass
+
+
+def invalidate_follow(follow):
+    try:
+        invalidate(
+            f'author:{follow.author.username}',
+            f'author:{follow.user.username}',
+            f'follow:{follow.user_id}'
+        )
+    except ObjectDoesNotExist:
+        pass
+
+
+def invalidate_group(group):
+    posts = group.posts.values_list('pk', 'author__username')
+    scopes = {'index', 'groups', f'group:{group.slug}'}
+    for post_id, username in posts:
+        scopes.update((f'post:{post_id}', f'author:{username}'))
+    invalidate(*scopes)
+
+
+def invalidate_author(user):
+    """Сбрасывает страницы, где показано имя пользователя: его профиль,
+    его записи, записи с его комментариями и списки подписок."""
+    scopes = {'index', f'author:{user.username}'}
+    for post_id, slug in user.posts.values_list('pk', 'group__slug'):
+        scopes.add(f'post:{post_id}')
+        if slug:
+            scopes.add(f'group:{slug}')
+    scopes.update(f'post:{post_id}' for post_id in
+                  user.comments.values_list('post_id', flat=True))
+    scopes.add(f'follow:{user.pk}')
+    scopes.update(f'follow:{user_id}' for user_id in
+                  user.following.values_list('user_id', flat=True))
+    invalidate(*scopes)
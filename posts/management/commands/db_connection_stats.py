@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from yatube.db.metrics import reset, stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько соединений с базой создано и переиспользовано'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='обнулить счетчики')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset()
+            self.stdout.write('Счетчики соединений обнулены')
+            return
+        counters = stats()
+        total = counters['created'] + counters['reused']
+        ratio = counters['reused'] / total if total else 0
+        setup_ms = counters['setup_us'] / 1000
+        created = counters['created'] or 1
+        self.stdout.write(
+            f'Создано: {counters["created"]}, '
+            f'переиспользовано: {counters["reused"]}, '
+            f'доля переиспользования: {ratio:.1%}, '
+            f'неисправных: {counters["unhealthy"]}, '
+            f'ожиданий свободного соединения: {counters["waited"]}\n'
+            f'Настройка соединения: {setup_ms / created:.2f} мс на '
+            f'соединение, {setup_ms / (total or 1):.2f} мс на запрос'
+        )
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import WORKERS, process_in_background
+
+
+class Command(BaseCommand):
+    help = ('Очищает картинки записей от EXIF и строит миниатюры '
+            'всех размеров')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=WORKERS)
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True).distinct().iterator()
+        total = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for _ in pool.map(process_in_background, names):
+                total += 1
+        self.stdout.write(f'Обработано картинок: {total}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша страниц'
+
+    def handle(self, *args, **options):
+        counters = stats()
+        total = counters['hits'] + counters['misses']
+        ratio = counters['hits'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {counters["hits"]}, промахов: {counters["misses"]}, '
+            f'доля попаданий: {ratio:.1%}'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс записей'
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write('Поисковый индекс перестроен')
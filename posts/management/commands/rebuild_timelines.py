@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Заполняет заново или обрезает ленты подписок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trim', action='store_true',
+            help='только обрезать ленты до TIMELINE_DEPTH записей'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True).distinct()
+        for user_id in user_ids.iterator():
+            if options['trim']:
+                timeline.trim(user_id)
+            else:
+                timeline.rebuild(user_id)
+        self.stdout.write('Ленты подписок обновлены')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import User, UserStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики записей и подписок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = list(
+            User.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        for start in range(0, len(user_ids), batch_size):
+            UserStats.objects.rebuild(User.objects.filter(
+                pk__in=user_ids[start:start + batch_size]
+            ))
+        self.stdout.write(f'Пересчитано пользователей: {len(user_ids)}')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from yatube.profiling import stats
+
+TOP = 5
+
+
+class Command(BaseCommand):
+    help = 'Показывает средние показатели профилированных запросов по URL'
+
+    def handle(self, *args, **options):
+        for url_name, counters in stats().items():
+            requests = counters['requests'] or 1
+            self.stdout.write(
+                f'{url_name}: запросов {counters["requests"]}, '
+                f'SQL-запросов {counters["queries"] / requests:.1f}, '
+                f'SQL {counters["sql_us"] / requests / 1000:.1f} мс, '
+                f'шаблоны {counters["render_us"] / requests / 1000:.1f} мс, '
+                f'повторов {counters["duplicates"] / requests:.1f}'
+            )
+            for sql, count in list(counters['fingerprints'].items())[:TOP]:
+                self.stdout.write(f'    {count / requests:.1f} x {sql}')
@@ -0,0 +1,246 @@
+import io
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from PIL import Image
+
+from posts.models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'пушкин онегин татьяна ленский дуэль бал письмо деревня осень зима '
+    'петербург москва роман поэма стих перо чернила дядя правила уважать '
+    'заставил лучше выдумать пример другим наука боже скука больной сидеть'
+).split()
+PLACEHOLDERS = 8
+
+context = {}
+
+
+def zipf(count, alpha):
+    """Накопленные веса степенного распределения для random.choices."""
+    return list(accumulate(1 / rank ** alpha for rank in range(1, count + 1)))
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Дает задать даты полям с auto_now_add, чтобы записи и комментарии
+    не получили одну и ту же дату вставки."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def date(rnd):
+    return context['now'] - timedelta(
+        seconds=rnd.uniform(0, context['options']['days'] * 86400)
+    )
+
+
+def words(rnd, low, high):
+    return ' '.join(rnd.choices(WORDS, k=rnd.randint(low, high)))
+
+
+def make_posts(rnd, count):
+    options = context['options']
+    return Post.objects.bulk_create(
+        Post(
+            text=words(rnd, 10, 60),
+            pub_date=date(rnd),
+            author_id=rnd.choices(context['user_ids'],
+                                  cum_weights=context['user_weights'])[0],
+            group_id=(rnd.choice(context['group_ids'])
+                      if context['group_ids'] and rnd.random() < 0.5
+                      else None),
+            image=(rnd.choice(context['images'])
+                   if context['images'] and rnd.random() < options['images']
+                   else None)
+        )
+        for _ in range(count)
+    )
+
+
+def make_comments(rnd, count):
+    post_ids = rnd.choices(context['post_ids'],
+                           cum_weights=context['post_weights'], k=count)
+    author_ids = rnd.choices(context['user_ids'],
+                             cum_weights=context['user_weights'], k=count)
+    return Comment.objects.bulk_create(
+        Comment(post_id=post_id, author_id=author_id,
+                text=words(rnd, 3, 20), created=date(rnd))
+        for post_id, author_id in zip(post_ids, author_ids)
+    )
+
+
+def make_follows(rnd, user_ids):
+    options = context['options']
+    limit = len(context['user_ids']) // 2
+    follows = []
+    for user_id in user_ids:
+        # Среднее распределения Парето с alpha=1.5 равно 3.
+        wanted = min(limit, int(rnd.paretovariate(1.5) * options['follows']
+                                / 3))
+        authors = set()
+        while len(authors) < wanted:
+            authors.update(
+                author_id for author_id in rnd.choices(
+                    context['user_ids'], cum_weights=context['user_weights'],
+                    k=wanted - len(authors)
+                ) if author_id != user_id
+            )
+        follows.extend(Follow(user_id=user_id, author_id=author_id)
+                       for author_id in authors)
+    Follow.objects.bulk_create(follows, ignore_conflicts=True)
+    return len(follows)
+
+
+def generate(task):
+    kind, number, payload = task
+    rnd = random.Random(f'{context["options"]["seed"]}:{kind}:{number}')
+    with explicit_dates(Post._meta.get_field('pub_date'),
+                        Comment._meta.get_field('created')):
+        if kind == 'posts':
+            return len(make_posts(rnd, payload))
+        if kind == 'comments':
+            return len(make_comments(rnd, payload))
+        return make_follows(rnd, payload)
+
+
+def setup_worker(state):
+    connections.close_all()
+    context.update(state)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, записями, '
+            'комментариями и подписками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='подписок на пользователя в среднем')
+        parser.add_argument('--images', type=float, default=0,
+                            help='доля записей с картинкой-заглушкой')
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='показатель степенного распределения')
+        parser.add_argument('--days', type=int, default=365,
+                            help='за сколько дней разбросать даты')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='user',
+                            help='начало имен новых пользователей')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='не пересчитывать счетчики, поиск и ленты')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(
+                username__startswith=options['prefix']).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {options["prefix"]} уже есть, '
+                f'задайте другой --prefix'
+            )
+        self.workers = options['workers']
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=f'{options["prefix"]}{number}', password=password)
+             for number in range(options['users'])),
+            batch_size=batch_size
+        )
+        user_ids = list(User.objects.filter(
+            username__startswith=options['prefix']
+        ).order_by('pk').values_list('pk', flat=True))
+        rnd.shuffle(user_ids)
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}',
+                  slug=f'{options["prefix"]}-{number}'[:20],
+                  description=words(rnd, 10, 30))
+            for number in range(options['groups'])
+        )
+        state = {
+            'options': options,
+            'now': timezone.now(),
+            'user_ids': user_ids,
+            'user_weights': zipf(len(user_ids), options['alpha']),
+            'group_ids': list(Group.objects.filter(
+                slug__startswith=f'{options["prefix"]}-'
+            ).values_list('pk', flat=True)),
+            'images': self.placeholders(rnd) if options['images'] else [],
+        }
+        first_post = (Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0) + 1
+
+        posts = self.run('posts', state, [
+            min(batch_size, options['posts'] - start)
+            for start in range(0, options['posts'], batch_size)
+        ])
+        post_ids = list(Post.objects.filter(
+            pk__gte=first_post).order_by('pk').values_list('pk', flat=True))
+        rnd.shuffle(post_ids)
+        state['post_ids'] = post_ids
+        state['post_weights'] = zipf(len(post_ids), options['alpha'])
+        comments = self.run('comments', state, [
+            min(batch_size, options['comments'] - start)
+            for start in range(0, options['comments'], batch_size)
+        ] if post_ids else [])
+        chunk = max(1, batch_size // max(1, options['follows']))
+        follows = Follow.objects.count()
+        self.run('follows', state, [
+            user_ids[start:start + chunk]
+            for start in range(0, len(user_ids), chunk)
+        ] if len(user_ids) > 1 else [])
+        follows = Follow.objects.count() - follows
+
+        if not options['no_rebuild']:
+            for command in ('rebuild_user_stats', 'rebuild_search_index',
+                            'rebuild_timelines'):
+                call_command(command, stdout=io.StringIO())
+        cache.clear()
+        self.stdout.write(
+            f'Создано: пользователей {len(user_ids)}, '
+            f'групп {len(state["group_ids"])}, записей {posts}, '
+            f'комментариев {comments}, подписок {follows}'
+        )
+
+    def placeholders(self, rnd):
+        names = []
+        for number in range(PLACEHOLDERS):
+            image = io.BytesIO()
+            color = tuple(rnd.randrange(256) for _ in range(3))
+            Image.new('RGB', (1200, 800), color).save(image, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/placeholder_{number}.jpg',
+                ContentFile(image.getvalue())
+            ))
+        return names
+
+    def run(self, kind, state, payloads):
+        tasks = [(kind, number, payload)
+                 for number, payload in enumerate(payloads)]
+        workers = min(self.workers, len(tasks))
+        if workers <= 1:
+            context.update(state)
+            return sum(map(generate, tasks))
+        connections.close_all()
+        with multiprocessing.Pool(workers, setup_worker, (state,)) as pool:
+            return sum(pool.imap_unordered(generate, tasks))
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.6 on 2026-10-17 18:38
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = list(Follow.objects.values('user', 'author').annotate(
+        links=models.Count('pk'),
+        keep=models.Min('pk')
+    ).filter(links__gt=1).order_by())
+    affected = set()
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        condition = models.Q(pk__in=[])
+        for link in duplicates[start:start + BATCH_SIZE]:
+            condition |= models.Q(
+                user=link['user'], author=link['author']
+            ) & ~models.Q(pk=link['keep'])
+            affected.update((link['user'], link['author']))
+        Follow.objects.filter(condition).delete()
+    for user_id in affected:
+        UserStats.objects.filter(pk=user_id).update(
+            followers_count=Follow.objects.filter(author_id=user_id).count(),
+            following_count=Follow.objects.filter(user_id=user_id).count()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique link'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+
+def fill_updated(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_follow_unique_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='date updated'),
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+    ]
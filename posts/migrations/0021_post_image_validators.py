@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-17 18:57
+
+from django.db import migrations, models
+import posts.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_post_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='posts/', validators=[posts.uploads.validate_image_upload], verbose_name='Приложу-ка я картинку'),
+        ),
+    ]
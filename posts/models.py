@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Coalesce
+
+from .uploads import validate_image_upload
 
 User = get_user_model()
 
@@ -17,9 +20,31 @@ class Group(models.Model):
         return self.title
 
 
+def comments_count(post_ref='pk'):
+    return Coalesce(
+        models.Subquery(
+            Comment.objects.filter(
+                post=models.OuterRef(post_ref)
+            ).order_by().values('post').annotate(
+                count=models.Count('pk')
+            ).values('count'),
+            output_field=models.IntegerField()
+        ),
+        0
+    )
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        return self.select_related('author', 'group').annotate(
+            comments_count=comments_count()
+        )
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    updated = models.DateTimeField('date updated', auto_now=True)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='posts'
     )
@@ -36,14 +61,31 @@ class Post(models.Model):
         upload_to='posts/',
         verbose_name='Приложу-ка я картинку',
         blank=True,
-        null=True
+        null=True,
+        validators=[validate_image_upload]
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -69,6 +111,38 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
+
+class FollowQuerySet(models.QuerySet):
+    def follow(self, user, author):
+        """Создает подписку и возвращает ее; None, если она уже есть."""
+        try:
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                return self.create(user=user, author=author)
+        except IntegrityError:
+            return None
+
+    def unfollow(self, user, author):
+        """Удаляет подписку и сообщает, была ли она.
+
+        Пустой UPDATE сначала берет блокировку на запись: иначе в SQLite
+        чтение строк перед удалением столкнется с параллельной отпиской,
+        а так сигналы удаления получает только одна из них.
+        """
+        links = self.filter(user=user, author=author)
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            if not links.update(author=author):
+                return False
+            links.delete()
+        return True
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -76,8 +150,112 @@ class Follow(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='following')
 
+    objects = FollowQuerySet.as_manager()
+
     class Meta:
-        models.UniqueConstraint(
-            fields=['user', 'author'],
-            name='unique link'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique link'
+            )
+        ]
+
+
+class UserStatsManager(models.Manager):
+    def for_user(self, user):
+        try:
+            return self.get(pk=user.pk)
+        except self.model.DoesNotExist:
+            return self.rebuild(User.objects.filter(pk=user.pk))[0]
+
+    def change(self, user_id, **deltas):
+        with transaction.atomic():
+            updated = self.filter(pk=user_id).update(**{
+                field: models.F(field) + delta
+                for field, delta in deltas.items()
+            })
+            if not updated and all(
+                    delta > 0 for delta in deltas.values()):
+                self.rebuild(User.objects.filter(pk=user_id))
+
+    def rebuild(self, users):
+        def count(model, field):
+            return Coalesce(models.Subquery(
+                model.objects.filter(
+                    **{field: models.OuterRef('pk')}
+                ).order_by().values(field).annotate(
+                    count=models.Count('pk')
+                ).values('count'),
+                output_field=models.IntegerField()
+            ), 0)
+
+        users = users.annotate(
+            stats_posts=count(Post, 'author'),
+            stats_followers=count(Follow, 'author'),
+            stats_following=count(Follow, 'user'),
+        ).values_list(
+            'pk', 'stats_posts', 'stats_followers', 'stats_following'
         )
+        stats = [
+            self.model(
+                user_id=user_id,
+                posts_count=posts,
+                followers_count=followers,
+                following_count=following
+            )
+            for user_id, posts, followers, following in users
+        ]
+        with transaction.atomic():
+            self.filter(pk__in=[item.user_id for item in stats]).delete()
+            self.bulk_create(stats)
+        return stats
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    objects = UserStatsManager()
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique timeline entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            )
+        ]
@@ -0,0 +1,149 @@
+import heapq
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from itertools import islice
+from operator import itemgetter
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+POSTS_PER_PAGE = 10
+
+
+def encode_cursor(post):
+    value = f'{post.pub_date.isoformat()}|{post.pk}'
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(value):
+    try:
+        pub_date, pk = urlsafe_b64decode(
+            value.encode()).decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+def parse_page_number(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class KeysetWindow:
+    """Страница ленты для Paginator без COUNT(*) и OFFSET.
+
+    Позиция берется из курсора (pub_date, id) соседней страницы, а
+    count() сообщает только, есть ли что-то дальше текущей страницы.
+    Без курсора работает прежний OFFSET, чтобы старые ссылки ?page=N
+    не ломались. Явный order_by выборки задает поля ключа: они должны
+    идти по убыванию и повторять pub_date и id записи, а item
+    превращает строку выборки в запись.
+
+    Вместо одной выборки можно передать список: каждая читается по
+    своему индексу с тем же курсором и лимитом, а страница собирается
+    слиянием, без общей сортировки в базе.
+    """
+
+    def __init__(self, queryset, number, per_page, after=None, before=None,
+                 item=None):
+        if not isinstance(queryset, (list, tuple)):
+            queryset = [queryset]
+        self.sources = []
+        for source in queryset:
+            ordering = source.query.order_by or ('-pub_date', '-id')
+            keys = tuple(field.lstrip('-') for field in ordering)
+            self.sources.append((source.order_by(*ordering), keys))
+        self.item = item or (lambda row: row)
+        self.number = number
+        self.per_page = per_page
+        self.after = after
+        self.before = before
+        self.rows = None
+        self.more = False
+
+    def select(self, stop, start=0, cursor=None, lookup='lt'):
+        """Строки с start по stop после курсора; lookup='gt' читает в
+        обратную сторону."""
+        ascending = lookup == 'gt'
+        parts = []
+        for queryset, (date_key, id_key) in self.sources:
+            if cursor:
+                pub_date, pk = cursor
+                queryset = queryset.filter(
+                    Q(**{f'{date_key}__{lookup}': pub_date})
+                    | Q(**{date_key: pub_date, f'{id_key}__{lookup}': pk})
+                )
+            if ascending:
+                queryset = queryset.order_by(date_key, id_key)
+            if len(self.sources) == 1:
+                return list(queryset[start:stop])
+            parts.append([
+                ((getattr(row, date_key), getattr(row, id_key)), row)
+                for row in queryset[:stop]
+            ])
+        merged = heapq.merge(*parts, key=itemgetter(0),
+                             reverse=not ascending)
+        return [row for _, row in islice(merged, start, stop)]
+
+    @property
+    def offset(self):
+        return (self.number - 1) * self.per_page
+
+    def fetch(self):
+        limit = self.per_page + 1
+        if self.before and self.number > 1:
+            rows = self.select(limit, cursor=self.before, lookup='gt')
+            if len(rows) == limit:
+                self.rows = [self.item(row)
+                             for row in rows[self.per_page - 1::-1]]
+                self.more = True
+                return
+            self.number = 1
+            rows = self.select(limit)
+        elif self.after and self.number > 1:
+            rows = self.select(limit, cursor=self.after)
+        else:
+            rows = self.select(self.offset + limit, start=self.offset)
+        self.rows = [self.item(row) for row in rows[:self.per_page]]
+        self.more = len(rows) > self.per_page
+
+    def count(self):
+        if self.rows is None:
+            self.fetch()
+        return self.offset + len(self.rows) + int(self.more)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if self.rows is None:
+            self.fetch()
+        if isinstance(item, slice) and (item.start or 0) == self.offset:
+            return self.rows[:item.stop - self.offset]
+        if isinstance(item, slice):
+            return [self.item(row)
+                    for row in self.select(item.stop, item.start or 0)]
+        return self.item(self.select(item + 1, item)[0])
+
+
+def paginate(request, queryset, per_page=POSTS_PER_PAGE, item=None):
+    window = KeysetWindow(
+        queryset,
+        parse_page_number(request.GET.get('page')),
+        per_page,
+        after=decode_cursor(request.GET.get('after', '')),
+        before=decode_cursor(request.GET.get('before', '')),
+        item=item,
+    )
+    window.fetch()
+    page = Paginator(window, per_page).get_page(window.number)
+    if page.object_list:
+        page.previous_cursor = encode_cursor(page.object_list[0])
+        page.next_cursor = encode_cursor(page.object_list[-1])
+    return page
@@ -0,0 +1,214 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+MATCH_START = '\x02'
+MATCH_END = '\x03'
+SNIPPET_WORDS = getattr(settings, 'SEARCH_SNIPPET_WORDS', 24)
+WORD_RE = re.compile(r'\w+')
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Ленивая выборка для Paginator: считает и режет выдачу в SQL."""
+
+    def __init__(self, backend, query):
+        self.backend = backend
+        self.query = query
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = (
+                self.backend.count(self.query) if self.query else 0
+            )
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        offset = item.start or 0
+        limit = item.stop - offset
+        if not self.query or limit <= 0:
+            return []
+        hits = self.backend.hits(self.query, limit, offset)
+        posts = Post.objects.for_feed().in_bulk(
+            [post_id for post_id, snippet in hits]
+        )
+        results = []
+        for post_id, snippet in hits:
+            post = posts.get(post_id)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+class SQLiteSearchBackend:
+    def prepare(self, query):
+        return ' '.join(
+            '"{}"*'.format(word) for word in WORD_RE.findall(query)
+        )
+
+    def count(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [query]
+            )
+            return cursor.fetchone()[0]
+
+    def hits(self, query, limit, offset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [MATCH_START, MATCH_END, '…', SNIPPET_WORDS,
+                 query, limit, offset]
+            )
+            return cursor.fetchall()
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text]
+            )
+
+    def index_many(self, posts):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                f'({", ".join(["%s"] * len(posts))})',
+                [post.pk for post in posts]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+                [(post.pk, post.text) for post in posts]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                f'SELECT id, text FROM {Post._meta.db_table}'
+            )
+
+
+class PostgresSearchBackend:
+    config = getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+    def prepare(self, query):
+        return ' '.join(WORD_RE.findall(query))
+
+    def count(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {Post._meta.db_table} '
+                f'WHERE to_tsvector(%s::regconfig, text) '
+                f'@@ plainto_tsquery(%s::regconfig, %s)',
+                [self.config, self.config, query]
+            )
+            return cursor.fetchone()[0]
+
+    def hits(self, query, limit, offset):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, ts_headline(%s::regconfig, text, q, %s) '
+                f'FROM {Post._meta.db_table}, '
+                f'plainto_tsquery(%s::regconfig, %s) q '
+                f'WHERE to_tsvector(%s::regconfig, text) @@ q '
+                f'ORDER BY ts_rank(to_tsvector(%s::regconfig, text), q) '
+                f'DESC, id DESC LIMIT %s OFFSET %s',
+                [self.config,
+                 f'StartSel={MATCH_START}, StopSel={MATCH_END}, '
+                 f'MaxWords={SNIPPET_WORDS}',
+                 self.config, query, self.config, self.config,
+                 limit, offset]
+            )
+            return cursor.fetchall()
+
+    def index(self, post):
+        pass
+
+    def index_many(self, posts):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class LikeSearchBackend:
+    def prepare(self, query):
+        return query.strip()
+
+    def count(self, query):
+        return Post.objects.filter(text__icontains=query).count()
+
+    def hits(self, query, limit, offset):
+        posts = Post.objects.filter(
+            text__icontains=query
+        ).values_list('id', 'text')[offset:offset + limit]
+        return [
+            (post_id, Truncator(text).words(SNIPPET_WORDS))
+            for post_id, text in posts
+        ]
+
+    def index(self, post):
+        pass
+
+    def index_many(self, posts):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+def search_posts(query):
+    backend = get_backend()
+    return SearchResults(backend, backend.prepare(query))
@@ -0,0 +1,127 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import cache, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .search import get_backend
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.change(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    UserStats.objects.change(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.change(instance.author_id, followers_count=1)
+        UserStats.objects.change(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    timeline.drop_follower(instance.author_id)
+    UserStats.objects.change(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_timeline(sender, instance, **kwargs):
+    timeline.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_pages(sender, instance, **kwargs):
+    """Запоминает группу и автора из базы: если запись перенесли, их
+    страницы тоже надо сбросить."""
+    if instance.pk is None:
+        return
+    instance._stored_scopes = [
+        scope
+        for slug, username in Post.objects.filter(pk=instance.pk)
+        .values_list('group__slug', 'author__username')
+        for scope in ([f'author:{username}']
+                      + ([f'group:{slug}'] if slug else []))
+    ]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    cache.invalidate_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    cache.invalidate_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    cache.invalidate_follow(instance)
+
+
+@receiver(pre_save, sender=Group)
+def invalidate_renamed_group_pages(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old = Group.objects.filter(pk=instance.pk).first()
+    if old is not None and old.slug != instance.slug:
+        cache.invalidate_group(old)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    cache.invalidate_group(instance)
+
+
+@receiver(pre_save, sender=User)
+def invalidate_renamed_user_pages(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).first()
+    if old is not None and old.username != instance.username:
+        cache.invalidate_author(old)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, **kwargs):
+    cache.invalidate(f'author:{instance.username}')
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    thumbnails.schedule(instance)
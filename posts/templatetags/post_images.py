@@ -0,0 +1,33 @@
+from django import template
+from sorl.thumbnail import get_thumbnail
+
+from posts.thumbnails import (CARD_OPTIONS, CARD_WIDTHS, FORMATS,
+                              card_geometry)
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(image):
+    variants = {}
+    for image_format in FORMATS:
+        for width in CARD_WIDTHS:
+            thumbnail = get_thumbnail(
+                image, card_geometry(width),
+                **dict(CARD_OPTIONS, format=image_format)
+            )
+            if thumbnail.name == image.name:
+                return {'src': image.url}
+            variants.setdefault(image_format, []).append(
+                f'{thumbnail.url} {width}w'
+            )
+    fallback, *modern = FORMATS
+    return {
+        'src': variants[fallback][CARD_WIDTHS.index(960)].split()[0],
+        'srcset': ', '.join(variants[fallback]),
+        'sources': [
+            {'type': f'image/{image_format.lower()}',
+             'srcset': ', '.join(variants[image_format])}
+            for image_format in reversed(modern)
+        ],
+    }
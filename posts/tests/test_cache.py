@@ -0,0 +1,394 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.cache import counters, now, stats
+from posts.models import Comment, Follow, Group, Post, User
+from yatube.cache import SQLiteCache
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.author = User.objects.create(username='test')
+        cls.reader = User.objects.create(username='blackemcee')
+        cls.group = Group.objects.create(title='Поэзия', slug='poetry')
+        cls.other_group = Group.objects.create(title='Проза', slug='prose')
+        cls.post = Post.objects.create(
+            text='Пушкин', author=cls.author, group=cls.group
+        )
+        cls.urls = {
+            'index': reverse('index'),
+            'group': reverse('groups', args=[cls.group.slug]),
+            'other_group': reverse('groups', args=[cls.other_group.slug]),
+            'profile': reverse('profile', args=[cls.author.username]),
+            'post': reverse('post', args=[cls.author.username, cls.post.id]),
+        }
+
+    def setUp(self):
+        counters.flush(force=True)
+        cache.clear()
+
+    def assertCached(self, url):
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    def test_anonymous_pages_are_cached(self):
+        """
+        Проверка, что повторный показ страницы гостю не обращается к базе
+        и учитывается в счетчиках
+        """
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                self.assertCached(url)
+        counters.flush(force=True)
+        self.assertEqual(stats(), {'hits': 5, 'misses': 5})
+
+    def test_authorized_pages_are_not_cached(self):
+        """
+        Проверка, что авторизованному пользователю страница не
+        отдается из кеша гостя
+        """
+        authorized_client = Client()
+        authorized_client.force_login(self.reader)
+        self.guest_client.get(self.urls['index'])
+        response = authorized_client.get(self.urls['index'])
+        self.assertContains(response, 'Новая запись')
+        counters.flush(force=True)
+        self.assertEqual(stats()['hits'], 0)
+
+    def test_new_comment_invalidates_only_affected_pages(self):
+        """
+        Проверка, что комментарий сбрасывает страницы записи, автора,
+        группы и главную, но не чужую группу
+        """
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Онегин'
+        )
+        for name in ('index', 'group', 'profile', 'post'):
+            with self.subTest(page=name):
+                response = self.guest_client.get(self.urls[name])
+                self.assertContains(response, 'Комментариев: 1')
+        self.assertCached(self.urls['other_group'])
+
+    def test_follow_invalidates_profile(self):
+        """
+        Проверка, что подписка сбрасывает профиль автора
+        """
+        self.guest_client.get(self.urls['profile'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.guest_client.get(self.urls['profile'])
+        self.assertEqual(response.context['number_of_followers'], 1)
+
+    def test_recreated_user_gets_fresh_profile(self):
+        """
+        Проверка, что профиль пересозданного пользователя с тем же
+        именем не берется из кеша
+        """
+        user = User.objects.create(username='lermontov')
+        url = reverse('profile', args=[user.username])
+        self.guest_client.get(url)
+        user.delete()
+        User.objects.create(username='lermontov')
+        self.assertIsNotNone(self.guest_client.get(url).context)
+
+    def test_group_rename_invalidates_post_page(self):
+        """
+        Проверка, что переименование группы сбрасывает страницы ее записей
+        """
+        self.guest_client.get(self.urls['post'])
+        self.group.title = 'Лирика'
+        self.group.save()
+        response = self.guest_client.get(self.urls['post'])
+        self.assertContains(response, 'Лирика')
+
+    def test_moved_post_invalidates_old_group(self):
+        """
+        Проверка, что перенос записи в другую группу сбрасывает страницу
+        прежней группы
+        """
+        self.guest_client.get(self.urls['group'])
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+        response = self.guest_client.get(self.urls['group'])
+        self.assertNotContains(response, 'Пушкин')
+
+    def test_renamed_author_invalidates_old_profile_and_cards(self):
+        """
+        Проверка, что переименование автора сбрасывает профиль по старому
+        имени и карточки его записей
+        """
+        self.guest_client.get(self.urls['profile'])
+        self.guest_client.get(self.urls['group'])
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'pushkin'
+        author.save()
+        response = self.guest_client.get(self.urls['profile'])
+        self.assertEqual(response.status_code, 404)
+        response = self.guest_client.get(self.urls['group'])
+        self.assertContains(response, '@pushkin')
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test')
+        cls.reader = User.objects.create(username='blackemcee')
+        cls.post = Post.objects.create(text='Пушкин', author=cls.author)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader_client = Client()
+        cls.reader_client.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_card_is_cached_until_post_changes(self):
+        """
+        Проверка, что карточка записи берется из кеша, пока запись
+        не изменена и не прокомментирована
+        """
+        self.reader_client.get(reverse('index'))
+        Post.objects.filter(pk=self.post.pk).update(text='Лермонтов')
+        self.assertContains(self.reader_client.get(reverse('index')),
+                            'Пушкин')
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Онегин'
+        )
+        self.assertContains(self.reader_client.get(reverse('index')),
+                            'Лермонтов')
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Есенин'
+        post.save()
+        self.assertContains(self.reader_client.get(reverse('index')),
+                            'Есенин')
+
+    def test_edit_buttons_are_not_cached(self):
+        """
+        Проверка, что кнопки редактирования видит только автор, даже
+        если карточка уже закеширована
+        """
+        edit_url = reverse('post_edit', args=['test', self.post.id])
+        self.assertNotContains(self.reader_client.get(reverse('index')),
+                               edit_url)
+        self.assertContains(self.author_client.get(reverse('index')),
+                            edit_url)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test')
+        cls.reader = User.objects.create(username='blackemcee')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text='Пушкин', author=cls.author)
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.reader)
+        cls.urls = {
+            'index': reverse('index'),
+            'profile': reverse('profile', args=[cls.author.username]),
+            'post': reverse('post', args=[cls.author.username, cls.post.id]),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_page_is_not_modified(self):
+        """
+        Проверка, что на запрос с актуальным ETag или Last-Modified
+        приходит 304 без обращений к базе
+        """
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                # Last-Modified отдается, когда секунда изменения прошла.
+                with mock.patch('posts.cache.now',
+                                lambda: now() + 1000000):
+                    response = self.guest_client.get(url)
+                with self.assertNumQueries(0), mock.patch(
+                        'posts.cache.now', lambda: now() + 1000000):
+                    self.assertEqual(self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    ).status_code, 304)
+                    self.assertEqual(self.guest_client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                    ).status_code, 304)
+
+    def test_last_modified_waits_for_end_of_changed_second(self):
+        """
+        Проверка, что в секунду изменения страница отдается без
+        Last-Modified, чтобы изменение в ту же секунду не дало 304 по
+        If-Modified-Since
+        """
+        url = self.urls['index']
+        second = now() // 1000000 * 1000000
+        with mock.patch('posts.cache.now', lambda: second + 100000):
+            response = self.guest_client.get(url)
+            self.assertFalse(response.has_header('Last-Modified'))
+            Post.objects.create(text='Онегин', author=self.author)
+        with mock.patch('posts.cache.now', lambda: second + 1100000):
+            response = self.guest_client.get(url)
+            self.assertEqual(self.guest_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code, 304)
+            Post.objects.create(text='Ленский', author=self.author)
+            response = self.guest_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Ленский')
+
+    def test_comment_changes_etag(self):
+        """
+        Проверка, что после нового комментария страница записи отдается
+        заново
+        """
+        etag = self.guest_client.get(self.urls['post'])['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Онегин'
+        )
+        response = self.guest_client.get(self.urls['post'],
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authorized_etag_depends_on_user(self):
+        """
+        Проверка, что авторизованный пользователь не получает 304 по
+        ETag гостя и не получает Last-Modified
+        """
+        etag = self.guest_client.get(self.urls['index'])['ETag']
+        response = self.authorized_client.get(self.urls['index'],
+                                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_new_csrf_secret_changes_etag(self):
+        """
+        Проверка, что после смены секрета CSRF страница с формой
+        комментария отдается заново, а не как 304
+        """
+        client = Client()
+        client.force_login(self.reader)
+        client.get(self.urls['post'])
+        response = client.get(self.urls['post'])
+        self.assertEqual(client.get(
+            self.urls['post'], HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 304)
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        self.assertEqual(client.get(
+            self.urls['post'], HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 200)
+
+    def test_follow_feed_changes_with_followed_author(self):
+        """
+        Проверка, что ETag ленты подписок меняется с новой записью автора
+        """
+        url = reverse('follow_index')
+        etag = self.authorized_client.get(url)['ETag']
+        self.assertEqual(self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Post.objects.create(text='Лермонтов', author=self.author)
+        self.assertContains(
+            self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag),
+            'Лермонтов'
+        )
+
+
+def increment(location, times):
+    backend = SQLiteCache(location, {})
+    for _ in range(times):
+        backend.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.location = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+
+    def backend(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_are_shared_between_instances(self):
+        """
+        Проверка, что значение, записанное одним экземпляром кеша,
+        читается другим
+        """
+        self.backend().set('key', {'value': 1})
+        self.assertEqual(self.backend().get('key'), {'value': 1})
+        self.assertTrue(self.backend().delete('key'))
+        self.assertIsNone(self.backend().get('key'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """
+        Проверка, что при переполнении вытесняются давно не читанные
+        записи
+        """
+        backend = self.backend(MAX_ENTRIES=3, CULL_FREQUENCY=4,
+                               LRU_RESOLUTION=0)
+        for key in 'abc':
+            backend.set(key, key)
+            time.sleep(0.01)
+        backend.get('a')
+        backend.set('d', 'd')
+        self.assertEqual(backend.get_many('abcd'),
+                         {'a': 'a', 'c': 'c', 'd': 'd'})
+
+    def test_local_tier_serves_values_until_timeout(self):
+        """
+        Проверка, что копия в памяти процесса живет не дольше L1_TIMEOUT
+        """
+        backend = self.backend(L1_TIMEOUT=0.2)
+        backend.set('key', 1)
+        self.backend().set('key', 2)
+        self.assertEqual(backend.get('key'), 1)
+        time.sleep(0.3)
+        self.assertEqual(backend.get('key'), 2)
+
+    def test_incr_is_atomic_across_processes(self):
+        """
+        Проверка, что incr из нескольких процессов не теряет обновлений
+        """
+        self.backend().set('counter', 0)
+        workers = [
+            multiprocessing.Process(
+                target=increment, args=(self.location, 50)
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.backend().get('counter'), 200)
+
+    def test_cache_file_is_private(self):
+        """
+        Проверка, что файл кеша и журнал WAL доступны только владельцу
+        """
+        self.backend().set('key', 1)
+        for path in (self.location, self.location + '-wal'):
+            with self.subTest(path=path):
+                self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_tests_do_not_use_server_cache(self):
+        """
+        Проверка, что тесты работают с отдельным файлом кеша
+        """
+        self.assertNotEqual(cache.location,
+                            os.path.join(settings.BASE_DIR, 'cache.sqlite3'))
@@ -0,0 +1,168 @@
+import os
+import tempfile
+from unittest import mock, skipUnless
+
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+
+from posts.models import Post
+from yatube import replicas
+from yatube.db import metrics as db_metrics
+from yatube.db.base import DatabaseWrapper
+from yatube.replicas import ReplicaPinningMiddleware, ReplicaRouter
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Настройки только для SQLite')
+class SQLitePragmasTest(TestCase):
+    def test_connection_applies_pragmas_from_settings(self):
+        """
+        Проверка, что новое соединение получает настройки из PRAGMAS
+        """
+        expected = {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'cache_size': -64000,
+            'temp_store': 2,
+        }
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Настройки только для SQLite')
+@mock.patch.object(db_metrics.metrics, 'flush_seconds', 3600)
+class PersistentConnectionTest(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+        self.wrappers = []
+
+    def tearDown(self):
+        for wrapper in self.wrappers:
+            wrapper.close()
+
+    def wrapper(self, alias, **options):
+        wrapper = DatabaseWrapper(dict(
+            connection.settings_dict,
+            NAME=self.path,
+            CONN_MAX_AGE=60,
+            CONN_HEALTH_CHECKS=True,
+            **options
+        ), alias)
+        self.wrappers.append(wrapper)
+        return wrapper
+
+    def counted(self, action):
+        before = dict(db_metrics.metrics.pending)
+        action()
+        return {
+            name: value - before.get(name, 0)
+            for name, value in db_metrics.metrics.pending.items()
+            if name != 'setup_us' and value != before.get(name, 0)
+        }
+
+    def test_connection_is_reused_between_requests(self):
+        """
+        Проверка, что соединение переживает запрос и учитывается как
+        созданное, а затем как переиспользованное
+        """
+        wrapper = self.wrapper('persistent')
+        self.assertEqual(self.counted(wrapper.ensure_connection),
+                         {'created': 1})
+        opened = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertEqual(self.counted(wrapper.ensure_connection),
+                         {'reused': 1})
+        self.assertIs(wrapper.connection, opened)
+
+    def test_broken_connection_is_replaced(self):
+        """
+        Проверка, что неисправное соединение не переиспользуется
+        """
+        wrapper = self.wrapper('broken')
+        wrapper.ensure_connection()
+        opened = wrapper.connection
+        opened.close()
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertEqual(self.counted(wrapper.ensure_connection),
+                         {'unhealthy': 1, 'created': 1})
+        self.assertIsNot(wrapper.connection, opened)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_connections_are_capped_per_process(self):
+        """
+        Проверка, что сверх MAX_CONNECTIONS соединение не открывается,
+        пока не закроется одно из открытых
+        """
+        first = self.wrapper('capped', MAX_CONNECTIONS=1, CONNECTION_WAIT=0.1)
+        second = self.wrapper('capped', MAX_CONNECTIONS=1,
+                              CONNECTION_WAIT=0.1)
+        first.ensure_connection()
+        with self.assertRaises(OperationalError):
+            second.ensure_connection()
+        first.close()
+        second.ensure_connection()
+        self.assertIsNotNone(second.connection)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        replicas.unpin()
+
+    def tearDown(self):
+        replicas.unpin()
+
+    def request(self, method='get', cookies=None, write=False):
+        seen = {}
+
+        def view(request):
+            seen['before'] = self.router.db_for_read(Post)
+            if write:
+                self.router.db_for_write(Post)
+            seen['after'] = self.router.db_for_read(Post)
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        response = ReplicaPinningMiddleware(view)(request)
+        return seen, response
+
+    def test_reads_go_to_replica_until_write(self):
+        """
+        Проверка, что чтения идут на реплику, а после записи – в
+        основную базу
+        """
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_unsafe_requests_read_from_primary(self):
+        """
+        Проверка, что POST-запрос целиком читает из основной базы
+        """
+        seen, _ = self.request('post')
+        self.assertEqual(seen['before'], 'default')
+
+    def test_session_that_wrote_is_pinned(self):
+        """
+        Проверка, что после записи сессия получает cookie и следующие
+        запросы читают из основной базы
+        """
+        seen, response = self.request(write=True)
+        self.assertEqual(seen, {'before': 'replica', 'after': 'default'})
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        seen, response = self.request(
+            cookies={replicas.PIN_COOKIE: cookie.value}
+        )
+        self.assertEqual(seen['before'], 'default')
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Follow, User, UserStats
+
+
+class FollowConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='test')
+        self.user = User.objects.create_user(username='blackemcee')
+
+    def hammer(self, *url_names, rounds=20):
+        def worker(url_name):
+            client = Client()
+            client.force_login(self.user)
+            url = reverse(url_name, kwargs={'username': 'test'})
+            try:
+                return [client.get(url).status_code for _ in range(rounds)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(url_names)) as pool:
+            results = pool.map(worker, url_names)
+        return [status for statuses in results for status in statuses]
+
+    def test_concurrent_follow_creates_one_link(self):
+        """
+        Проверка, что одновременные подписки создают одну связь
+        и не падают
+        """
+        statuses = self.hammer(*['profile_follow'] * 4)
+        self.assertEqual(set(statuses), {302})
+        self.assertEqual(Follow.objects.filter(
+            user=self.user, author=self.author).count(), 1)
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).followers_count, 1)
+
+    def test_concurrent_follow_and_unfollow_stay_consistent(self):
+        """
+        Проверка, что вперемешку идущие подписки и отписки не падают
+        и не ломают счетчики
+        """
+        statuses = self.hammer(
+            'profile_follow', 'profile_unfollow',
+            'profile_follow', 'profile_unfollow'
+        )
+        self.assertEqual(set(statuses), {302})
+        links = Follow.objects.filter(
+            user=self.user, author=self.author).count()
+        self.assertLessEqual(links, 1)
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).followers_count, links)
+        self.assertEqual(
+            UserStats.objects.get(pk=self.user.pk).following_count, links)
+
+
+class UnfollowTest(TestCase):
+    def test_unfollow_sends_delete_signals_with_stored_link(self):
+        """
+        Проверка, что отписка отправляет pre_delete и post_delete с
+        настоящей строкой подписки
+        """
+        author = User.objects.create(username='test')
+        user = User.objects.create(username='blackemcee')
+        link = Follow.objects.create(user=user, author=author)
+        received = []
+
+        def receiver(signal, instance, **kwargs):
+            received.append((signal, instance.pk))
+
+        for signal in (pre_delete, post_delete):
+            signal.connect(receiver, sender=Follow)
+            self.addCleanup(signal.disconnect, receiver, sender=Follow)
+        self.assertTrue(Follow.objects.unfollow(user, author))
+        self.assertFalse(Follow.objects.unfollow(user, author))
+        self.assertEqual(received,
+                         [(pre_delete, link.pk), (post_delete, link.pk)])
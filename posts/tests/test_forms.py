@@ -56,6 +56,7 @@ class PostCreateFormTest(TestCase):
         новая запись в БД
         """
         posts_count = Post.objects.count()
+        self.form_data['image'].seek(0)
 
         form = PostCreateFormTest.authorized_client.post(
             reverse('new_post'),
@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.models import Follow, Group, Post, User, UserStats
 
 
 class GroupPostModelTest(TestCase):
@@ -60,3 +63,42 @@ class GroupPostModelTest(TestCase):
         """
         group = GroupPostModelTest.group
         self.assertEqual(str(group), group.title)
+
+
+class UserStatsModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test')
+        cls.user = User.objects.create(username='blackemcee')
+
+    def test_stats_follow_posts_and_follows(self):
+        """
+        Проверка, что счетчики пользователя обновляются при создании
+        и удалении постов и подписок
+        """
+        post = Post.objects.create(text='Пушкин', author=self.author)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        author_stats = UserStats.objects.get(pk=self.author.pk)
+        user_stats = UserStats.objects.get(pk=self.user.pk)
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.followers_count, 1)
+        self.assertEqual(user_stats.following_count, 1)
+        post.delete()
+        follow.delete()
+        author_stats.refresh_from_db()
+        user_stats.refresh_from_db()
+        self.assertEqual(author_stats.posts_count, 0)
+        self.assertEqual(author_stats.followers_count, 0)
+        self.assertEqual(user_stats.following_count, 0)
+
+    def test_rebuild_user_stats_command(self):
+        """
+        Проверка, что команда rebuild_user_stats исправляет
+        рассинхронизированные счетчики
+        """
+        Post.objects.create(text='Пушкин', author=self.author)
+        UserStats.objects.filter(pk=self.author.pk).update(posts_count=42)
+        call_command('rebuild_user_stats', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(pk=self.author.pk).posts_count, 1)
@@ -1,4 +1,7 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Group, Post, User
@@ -22,6 +25,9 @@ class PaginatorViewsTest(TestCase):
                 group=cls.group
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_contains_ten_records(self):
         """
         Проверка, что пагинатор выдает на первую страницу 10 постов
@@ -36,3 +42,35 @@ class PaginatorViewsTest(TestCase):
         """
         response = PaginatorViewsTest.client.get(reverse('index') + '?page=2')
         self.assertEqual(len(response.context.get('page').object_list), 3)
+
+    def test_cursor_links_walk_the_feed(self):
+        """
+        Проверка, что ссылки с курсором ведут на следующую и предыдущую
+        страницы без COUNT и OFFSET
+        """
+        client = PaginatorViewsTest.client
+        first_page = client.get(reverse('index')).context['page']
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('index'), {
+                'page': 2, 'after': first_page.next_cursor})
+        second_page = response.context['page']
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(*)', queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        self.assertEqual(second_page.number, 2)
+        self.assertFalse(second_page.has_next())
+        self.assertEqual(
+            list(second_page),
+            list(Post.objects.order_by('-pub_date', '-id')[10:])
+        )
+        response = client.get(reverse('index'), {
+            'page': 1, 'before': second_page.previous_cursor})
+        self.assertEqual(list(response.context['page']), list(first_page))
+
+    def test_broken_cursor_falls_back_to_page_number(self):
+        """
+        Проверка, что испорченный курсор не ломает страницу
+        """
+        response = PaginatorViewsTest.client.get(
+            reverse('index'), {'page': 2, 'after': 'garbage'})
+        self.assertEqual(len(response.context['page'].object_list), 3)
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch, reverse
+
+from posts.models import Group, Post, User
+from yatube.profiling import (QueryProfilingMiddleware, fingerprint, flush,
+                              stats)
+
+
+class QueryProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='blackemcee')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Post.objects.create(text='Пушкин', author=cls.user, group=cls.group)
+        cls.guest_client = Client()
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, 'slow.jsonl')
+
+    def read_log(self):
+        with open(self.log, encoding='utf-8') as log:
+            return [json.loads(line) for line in log]
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_has_server_timing(self):
+        """
+        Проверка, что профилированный ответ содержит Server-Timing с
+        временем SQL и отрисовки шаблонов
+        """
+        response = self.guest_client.get(reverse('index'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'sql;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'render;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_server_timing(self):
+        """
+        Проверка, что без выборки заголовок не добавляется
+        """
+        response = self.guest_client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_slow_request_is_logged(self):
+        """
+        Проверка, что медленный запрос попадает в журнал с именем URL,
+        числом запросов и временем отрисовки
+        """
+        with self.settings(PROFILING_SAMPLE_RATE=1, SLOW_REQUEST_MS=0,
+                           SLOW_REQUEST_LOG=self.log):
+            self.guest_client.get(reverse('groups', args=[self.group.slug]))
+        entry, = self.read_log()
+        self.assertEqual(entry['url_name'], 'groups')
+        self.assertEqual(entry['status'], 200)
+        self.assertTrue(entry['sampled'])
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['render_ms'], 0)
+
+    def test_duplicate_queries_are_fingerprinted(self):
+        """
+        Проверка, что одинаковые запросы с разными параметрами
+        считаются повторами
+        """
+        def view(request):
+            for pk in (1, 2, 3):
+                list(Post.objects.filter(pk=pk))
+            return HttpResponse()
+
+        with self.settings(PROFILING_SAMPLE_RATE=1, SLOW_REQUEST_MS=0,
+                           SLOW_REQUEST_LOG=self.log):
+            QueryProfilingMiddleware(view)(RequestFactory().get('/'))
+        entry, = self.read_log()
+        self.assertEqual(list(entry['duplicates'].values()), [3])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_duplicate_fingerprints_are_counted_per_view(self):
+        """
+        Проверка, что повторяющийся запрос попадает в счетчики своего
+        представления вместе с числом повторов
+        """
+        def view(request):
+            request.resolver_match = ResolverMatch(view, (), {},
+                                                   url_name='repeats')
+            for pk in (1, 2, 3):
+                list(Post.objects.filter(pk=pk))
+            return HttpResponse()
+
+        middleware = QueryProfilingMiddleware(view)
+        middleware(RequestFactory().get('/'))
+        middleware(RequestFactory().get('/'))
+        flush(force=True)
+        counters = stats()['repeats']
+        self.assertEqual(counters['requests'], 2)
+        self.assertEqual(counters['duplicates'], 6)
+        (sql, count), = counters['fingerprints'].items()
+        self.assertIn('posts_post', sql)
+        self.assertEqual(count, 6)
+
+    def test_fingerprint_collapses_in_lists(self):
+        """
+        Проверка, что списки IN и числа не различают отпечатки
+        """
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s) LIMIT 20'),
+        )
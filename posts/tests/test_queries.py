@@ -0,0 +1,142 @@
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginator import encode_cursor
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Пушкин',
+            slug='push',
+            description='Это сообщество про Пушкина'
+        )
+        cls.author = User.objects.create(username='test')
+        cls.user = User.objects.create_user(username='blackemcee')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(12):
+            post = Post.objects.create(
+                text='Пушкин' + str(i),
+                author=cls.author,
+                group=cls.group
+            )
+            Comment.objects.create(
+                post=post,
+                author=cls.user,
+                text='Комментарий' + str(i)
+            )
+        cls.guest_client = Client()
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_run_constant_number_of_queries(self):
+        """
+        Проверка, что ленты выполняют фиксированное число запросов
+        независимо от количества постов на странице
+        """
+        feeds = {
+            reverse('index'): (FeedQueriesTest.guest_client, 1),
+            reverse('groups', kwargs={'slug': 'push'}): (
+                FeedQueriesTest.guest_client, 2),
+            reverse('profile', kwargs={'username': 'test'}): (
+                FeedQueriesTest.guest_client, 3),
+            reverse('follow_index'): (FeedQueriesTest.authorized_client, 4),
+        }
+        for url, (client, queries) in feeds.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(len(response.context['page']), 10)
+
+    def test_feed_shows_comments_count(self):
+        """
+        Проверка, что карточка поста показывает число комментариев
+        без отдельных запросов
+        """
+        response = FeedQueriesTest.guest_client.get(reverse('index'))
+        self.assertEqual(response.context['page'][0].comments_count, 1)
+        self.assertContains(response, 'Комментариев: 1', count=10)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Пушкин',
+            slug='push',
+            description='Это сообщество про Пушкина'
+        )
+        cls.author = User.objects.create(username='test')
+        cls.user = User.objects.create_user(username='blackemcee')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Пушкин', author=cls.author, group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                QueryPlanTest.authorized_client.get(url).status_code, 200)
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                yield query['sql'], [row[-1] for row in cursor.fetchall()]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_use_indexes(self):
+        """
+        Проверка, что запросы страниц не читают таблицы целиком и не
+        сортируют выборку во временном B-дереве
+        """
+        urls = [
+            reverse('index'),
+            reverse('groups', kwargs={'slug': 'push'}),
+            reverse('profile', kwargs={'username': 'test'}),
+            reverse('post', kwargs={'username': 'test',
+                                    'post_id': QueryPlanTest.post.id}),
+            reverse('follow_index'),
+        ]
+        cursor = encode_cursor(QueryPlanTest.post)
+        urls += [f'{url}?page=2&after={cursor}' for url in urls]
+        for url in urls:
+            for sql, plan in self.plans(url):
+                with self.subTest(url=url, sql=sql):
+                    for step in plan:
+                        self.assertNotRegex(step, r'^SCAN \S+$')
+                        self.assertNotIn('TEMP B-TREE', step)
+
+    def test_follow_feed_reads_popular_authors_by_index(self):
+        """
+        Проверка, что лента с популярным автором читает его записи по
+        индексу, без сортировки всех его записей
+        """
+        cursor = encode_cursor(QueryPlanTest.post)
+        url = reverse('follow_index')
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 0):
+            for page in (url, f'{url}?page=2&after={cursor}'):
+                for sql, plan in self.plans(page):
+                    with self.subTest(url=page, sql=sql):
+                        for step in plan:
+                            self.assertNotRegex(step, r'^SCAN \S+$')
+                            self.assertNotIn('TEMP B-TREE', step)
+                            self.assertNotIn('MULTI-INDEX OR', step)
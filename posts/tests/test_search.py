@@ -0,0 +1,66 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.client = Client()
+        cls.author = User.objects.create(username='test')
+        cls.post = Post.objects.create(
+            text='Мой дядя самых честных правил',
+            author=cls.author
+        )
+        for i in range(12):
+            Post.objects.create(text=f'Онегин {i}', author=cls.author)
+
+    def test_search_finds_and_highlights_posts(self):
+        """
+        Проверка, что поиск находит запись по слову и подсвечивает
+        совпадение
+        """
+        response = SearchViewTest.client.get(
+            reverse('search_results'), {'q': 'честных'})
+        page = response.context['page']
+        self.assertEqual(list(page), [SearchViewTest.post])
+        self.assertContains(response, '<mark>честных</mark>')
+
+    def test_search_results_are_paginated(self):
+        """
+        Проверка, что выдача поиска разбита на страницы
+        """
+        url = reverse('search_results')
+        response = SearchViewTest.client.get(url, {'q': 'Онегин'})
+        self.assertEqual(len(response.context['page']), 10)
+        self.assertEqual(response.context['page'].paginator.count, 12)
+        response = SearchViewTest.client.get(
+            url, {'q': 'Онегин', 'page': 2})
+        self.assertEqual(len(response.context['page']), 2)
+
+    def test_search_index_follows_post_changes(self):
+        """
+        Проверка, что поисковый индекс обновляется при изменении
+        и удалении записи
+        """
+        url = reverse('search_results')
+        post = Post.objects.create(text='Евгений', author=self.author)
+        post.text = 'Татьяна'
+        post.save()
+        response = SearchViewTest.client.get(url, {'q': 'Евгений'})
+        self.assertEqual(len(response.context['page']), 0)
+        response = SearchViewTest.client.get(url, {'q': 'Татьяна'})
+        self.assertEqual(list(response.context['page']), [post])
+        post.delete()
+        response = SearchViewTest.client.get(url, {'q': 'Татьяна'})
+        self.assertEqual(len(response.context['page']), 0)
+
+    def test_search_escapes_query_syntax(self):
+        """
+        Проверка, что спецсимволы в запросе не ломают поиск
+        """
+        response = SearchViewTest.client.get(
+            reverse('search_results'), {'q': '"дядя* OR (NEAR'})
+        self.assertEqual(response.status_code, 200)
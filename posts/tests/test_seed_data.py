@@ -0,0 +1,52 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, TimelineEntry, User, UserStats
+
+
+class SeedDataTest(TestCase):
+    def seed(self, prefix):
+        call_command('seed_data', users=30, groups=3, posts=200,
+                     comments=300, follows=5, prefix=prefix, batch_size=64,
+                     stdout=io.StringIO())
+        users = User.objects.filter(username__startswith=prefix)
+        return users, Post.objects.filter(author__in=users).order_by('pk')
+
+    def test_seed_creates_related_data(self):
+        """
+        Проверка, что команда создает записи, комментарии и подписки и
+        пересчитывает производные данные
+        """
+        users, posts = self.seed('seed')
+        self.assertEqual(users.count(), 30)
+        self.assertEqual(posts.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertEqual(UserStats.objects.count(), 30)
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertGreater(
+            len(set(posts.values_list('pub_date', flat=True))), 1
+        )
+
+    def test_seed_is_deterministic(self):
+        """
+        Проверка, что одинаковый --seed дает одинаковые данные
+        """
+        _, first = self.seed('one')
+        _, second = self.seed('two')
+        self.assertEqual(list(first.values_list('text', flat=True)),
+                         list(second.values_list('text', flat=True)))
+
+    def test_posts_follow_power_law(self):
+        """
+        Проверка, что у самого активного автора намного больше записей,
+        чем в среднем
+        """
+        users, posts = self.seed('seed')
+        counts = sorted(
+            (posts.filter(author=user).count() for user in users),
+            reverse=True
+        )
+        self.assertGreater(counts[0], 3 * posts.count() / users.count())
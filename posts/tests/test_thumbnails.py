@@ -0,0 +1,116 @@
+import os
+import shutil
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+
+from posts import thumbnails
+from posts.models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=os.path.join(settings.BASE_DIR, 'temp_thumbnails')
+)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            text='Пушкин',
+            author=User.objects.create(username='test'),
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_do_not_resize_images_inline(self):
+        """
+        Проверка, что при отсутствии миниатюры страница получает
+        исходную картинку и не вызывает Pillow
+        """
+        geometry, options = thumbnails.SIZES[0]
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            image = get_thumbnail(self.post.image, geometry, **options)
+        self.assertEqual(image.name, self.post.image.name)
+        get_image.assert_not_called()
+
+    def test_missing_thumbnail_is_queued_once(self):
+        """
+        Проверка, что промах ставит построение миниатюр в пул один раз,
+        пока оно не выполнено
+        """
+        geometry, options = thumbnails.SIZES[0]
+        self.addCleanup(thumbnails.queued.clear)
+        with mock.patch.object(thumbnails, 'executor') as executor, \
+                mock.patch.object(thumbnails.transaction, 'on_commit',
+                                  lambda func: func()):
+            for _ in range(2):
+                get_thumbnail(self.post.image, geometry, **options)
+        executor.submit.assert_called_once_with(
+            thumbnails.generate_queued, self.post.image.name, False
+        )
+
+    def test_generated_thumbnails_are_served(self):
+        """
+        Проверка, что после генерации страница получает готовые
+        миниатюры всех размеров
+        """
+        thumbnails.generate(self.post.image.name)
+        for geometry, options in thumbnails.SIZES:
+            with self.subTest(geometry=geometry):
+                image = get_thumbnail(self.post.image, geometry, **options)
+                self.assertNotEqual(image.name, self.post.image.name)
+                self.assertTrue(os.path.exists(
+                    os.path.join(settings.MEDIA_ROOT, image.name)
+                ))
+
+    def test_picture_lists_every_width_and_format(self):
+        """
+        Проверка, что карточка отдает все ширины в srcset и современные
+        форматы в <source>, а до генерации – исходную картинку
+        """
+        template = Template(
+            '{% load post_images %}{% post_picture post.image %}'
+        )
+        context = Context({'post': self.post})
+        html = template.render(context)
+        self.assertNotIn('srcset', html)
+        self.assertIn(self.post.image.url, html)
+        thumbnails.generate(self.post.image.name)
+        html = template.render(context)
+        for width in thumbnails.CARD_WIDTHS:
+            self.assertIn(f' {width}w', html)
+        self.assertIn('type="image/webp"', html)
+
+    def test_generation_refreshes_post_once(self):
+        """
+        Проверка, что после генерации запись считается обновленной,
+        а повторный запуск ничего не строит
+        """
+        updated = self.post.updated
+        self.assertTrue(thumbnails.generate(self.post.image.name))
+        self.assertFalse(thumbnails.generate(self.post.image.name))
+        thumbnails.refresh(self.post.image.name)
+        self.assertGreater(
+            Post.objects.get(pk=self.post.pk).updated, updated
+        )
@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry, User
+from posts.paginator import KeysetWindow
+
+
+def feed(user):
+    window = KeysetWindow(timeline.follow_feed(user), 1, 100,
+                          item=timeline.feed_item)
+    window.fetch()
+    return window.rows
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test')
+        cls.user = User.objects.create(username='blackemcee')
+        cls.old_post = Post.objects.create(text='Пушкин', author=cls.author)
+
+    def test_follow_backfills_and_unfollow_clears_timeline(self):
+        """
+        Проверка, что подписка заполняет ленту старыми записями автора,
+        а отписка очищает ее
+        """
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(feed(self.user),
+                         [self.old_post])
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(feed(self.user), [])
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """
+        Проверка, что новая запись попадает в ленты подписчиков
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Онегин', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post).exists())
+        self.assertEqual(
+            feed(self.user),
+            [post, self.old_post]
+        )
+
+    def test_popular_author_is_read_on_demand(self):
+        """
+        Проверка, что записи автора с большим числом подписчиков
+        не раскладываются по лентам, а читаются при показе ленты
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 0):
+            post = Post.objects.create(text='Онегин', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(
+                user=self.user, post=post).exists())
+            self.assertEqual(
+                set(feed(self.user)),
+                {post, self.old_post}
+            )
+
+    def test_popular_author_is_merged_into_timeline(self):
+        """
+        Проверка, что записи популярного автора вливаются в ленту по
+        дате и не повторяют уже разложенные записи
+        """
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=other)
+        first = Post.objects.create(text='Онегин', author=other)
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 1):
+            Follow.objects.create(
+                user=User.objects.create(username='reader'),
+                author=self.author
+            )
+            popular = Post.objects.create(text='Ленский', author=self.author)
+            last = Post.objects.create(text='Татьяна', author=other)
+            self.assertEqual(feed(self.user),
+                             [last, popular, first, self.old_post])
+
+    def test_author_below_limit_again_is_fanned_out(self):
+        """
+        Проверка, что записи автора, опустившегося до FANOUT_LIMIT
+        подписчиков, раскладываются по лентам оставшихся подписчиков
+        """
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=self.user, author=self.author)
+        with mock.patch.object(timeline, 'FANOUT_LIMIT', 1):
+            follow = Follow.objects.create(user=reader, author=self.author)
+            post = Post.objects.create(text='Онегин', author=self.author)
+            follow.delete()
+            self.assertEqual(feed(self.user), [post, self.old_post])
+
+    def test_trim_keeps_fixed_depth(self):
+        """
+        Проверка, что лента обрезается до заданной глубины
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        for i in range(5):
+            Post.objects.create(text=f'Онегин {i}', author=self.author)
+        with mock.patch.object(timeline, 'TIMELINE_DEPTH', 3):
+            timeline.trim(self.user.pk)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 3)
+
+    def test_fan_out_trims_followers_timelines(self):
+        """
+        Проверка, что раскладка новых записей обрезает ленты подписчиков
+        без отдельного запуска rebuild_timelines --trim
+        """
+        Follow.objects.create(user=self.user, author=self.author)
+        with mock.patch.multiple(timeline, TIMELINE_DEPTH=3, TRIM_EVERY=2):
+            posts = [Post.objects.create(text=f'Онегин {i}',
+                                         author=self.author)
+                     for i in range(5)]
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.user).order_by(
+                '-pub_date', '-post_id').values_list('post_id', flat=True)),
+            [post.pk for post in reversed(posts[2:])]
+        )
+
+    def test_rebuild_keeps_newest_posts_of_all_authors(self):
+        """
+        Проверка, что пересборка кладет в ленту самые новые записи всех
+        авторов, на которых подписан пользователь
+        """
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=other)
+        Follow.objects.create(
+            user=self.user, author=User.objects.create(username='silent')
+        )
+        posts = [Post.objects.create(text=f'Онегин {i}',
+                                     author=(self.author, other)[i % 2])
+                 for i in range(4)]
+        TimelineEntry.objects.filter(user=self.user).delete()
+        with mock.patch.object(timeline, 'TIMELINE_DEPTH', 3):
+            timeline.rebuild(self.user.pk)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(user=self.user).order_by(
+                '-pub_date', '-post_id').values_list('post_id', flat=True)),
+            [post.pk for post in reversed(posts[1:])]
+        )
@@ -0,0 +1,267 @@
+import io
+import os
+import shutil
+import struct
+import tracemalloc
+import zlib
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIRequest
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, ImageFile
+from rest_framework.test import APIClient
+
+from posts import thumbnails, views
+from posts.models import Post, User
+from posts.uploads import validate_image_upload
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+BOUNDARY = 'UploadBoundary'
+
+
+def png_header(width, height):
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data)))
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                         8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(b'\x00' * 1024))
+            + chunk(b'IEND', b''))
+
+
+class MultipartStream:
+    """Тело запроса с файлом из size нулевых байт, которое нигде не
+    хранится целиком."""
+
+    def __init__(self, size):
+        self.head = (
+            f'--{BOUNDARY}\r\n'
+            f'Content-Disposition: form-data; name="text"\r\n\r\n'
+            f'Пушкин\r\n'
+            f'--{BOUNDARY}\r\n'
+            f'Content-Disposition: form-data; name="image"; '
+            f'filename="big.gif"\r\n'
+            f'Content-Type: image/gif\r\n\r\n'
+        ).encode() + SMALL_GIF
+        self.tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+        self.parts = [self.head, size - len(SMALL_GIF), self.tail]
+        self.length = len(self.head) + size - len(SMALL_GIF) + len(self.tail)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        data = self.next_part(size)
+        self.consumed += len(data)
+        return data
+
+    def next_part(self, size):
+        while self.parts:
+            part = self.parts[0]
+            if isinstance(part, int):
+                if part == 0:
+                    self.parts.pop(0)
+                    continue
+                count = min(part, size if size > 0 else part, 65536)
+                self.parts[0] = part - count
+                return b'\x00' * count
+            if not part:
+                self.parts.pop(0)
+                continue
+            count = len(part) if size < 0 else size
+            self.parts[0] = part[count:]
+            return part[:count]
+        return b''
+
+
+@override_settings(MEDIA_ROOT=os.path.join(settings.BASE_DIR, 'temp_uploads'))
+class UploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='blackemcee')
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_new_post_accepts_image(self):
+        """
+        Проверка, что новая запись сохраняет приложенную картинку
+        """
+        self.authorized_client.post(reverse('new_post'), {
+            'text': 'Пушкин',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        })
+        self.assertTrue(Post.objects.get(text='Пушкин').image)
+
+    def test_api_accepts_image(self):
+        """
+        Проверка, что API создает запись с картинкой
+        """
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/posts/', {
+            'text': 'Пушкин',
+            'image': SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Post.objects.get(text='Пушкин').image)
+
+    def test_too_many_pixels_rejected_from_header(self):
+        """
+        Проверка, что картинка с огромным разрешением отклоняется по
+        заголовку, без декодирования пикселей
+        """
+        with mock.patch.object(ImageFile.ImageFile, 'load') as load:
+            response = self.authorized_client.post(reverse('new_post'), {
+                'text': 'Пушкин',
+                'image': SimpleUploadedFile(
+                    'big.png', png_header(8000, 8000), 'image/png'
+                )
+            })
+        load.assert_not_called()
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое разрешение, можно не больше 40 мегапикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_api_rejects_too_many_pixels(self):
+        """
+        Проверка, что API тоже отклоняет картинку по заголовку
+        """
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/posts/', {
+            'text': 'Пушкин',
+            'image': SimpleUploadedFile(
+                'big.png', png_header(8000, 8000), 'image/png'
+            )
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('image', response.data)
+
+    def test_edit_with_missing_stored_image(self):
+        """
+        Проверка, что правка записи без новой картинки не читает
+        сохраненный файл, даже если его нет в хранилище
+        """
+        post = Post.objects.create(text='Пушкин', author=self.user,
+                                   image='posts/missing.gif')
+        response = self.authorized_client.post(
+            reverse('post_edit', args=[self.user.username, post.pk]),
+            {'text': 'Лермонтов'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'Лермонтов')
+
+    @override_settings(MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_oversized_upload_is_rejected_before_reading_body(self):
+        """
+        Проверка, что запрос с телом больше лимита отклоняется по
+        Content-Length, не читая тело и не расходуя память
+        """
+        size = 32 * 1024 * 1024
+        stream = MultipartStream(size)
+        request = WSGIRequest(RequestFactory()._base_environ(
+            PATH_INFO=reverse('new_post'),
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE=f'multipart/form-data; boundary={BOUNDARY}',
+            CONTENT_LENGTH=str(stream.length),
+            **{'wsgi.input': stream}
+        ))
+        request.user = self.user
+        tracemalloc.start()
+        try:
+            with self.assertRaises(RequestDataTooBig):
+                views.new_post(request)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(stream.consumed, 0)
+        self.assertFalse(Post.objects.exists())
+        self.assertLess(peak, 4 * 1024 * 1024)
+
+    def test_oversized_upload_gets_bad_request(self):
+        """
+        Проверка, что клиент получает 400 на слишком большое тело
+        """
+        with self.settings(MAX_UPLOAD_SIZE=1024):
+            response = self.authorized_client.post(reverse('new_post'), {
+                'text': 'Пушкин',
+                'image': SimpleUploadedFile(
+                    'big.gif', SMALL_GIF + b'\x00' * 128 * 1024, 'image/gif'
+                )
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_upload_over_limit_within_overhead_gets_form_error(self):
+        """
+        Проверка, что файл чуть больше лимита отклоняется формой с
+        понятной ошибкой
+        """
+        response = self.authorized_client.post(reverse('new_post'), {
+            'text': 'Пушкин',
+            'image': SimpleUploadedFile(
+                'big.gif', SMALL_GIF + b'\x00' * (1024 * 1024 + 4096),
+                'image/gif'
+            )
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Файл слишком большой', response.content.decode())
+        self.assertFalse(Post.objects.exists())
+
+    def test_unreadable_image_header_is_rejected(self):
+        """
+        Проверка, что файл с нечитаемым заголовком не проходит проверку
+        """
+        with self.assertRaises(ValidationError):
+            validate_image_upload(
+                SimpleUploadedFile('broken.png', b'\x89PNG broken',
+                                   'image/png')
+            )
+
+
+@override_settings(MEDIA_ROOT=os.path.join(settings.BASE_DIR, 'temp_uploads'))
+class NormalizeTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_exif_is_applied_and_stripped(self):
+        """
+        Проверка, что картинка поворачивается по EXIF и сохраняется
+        без метаданных
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, 'JPEG', exif=exif.tobytes())
+        name = default_storage.save('posts/photo.jpg',
+                                    ContentFile(buffer.getvalue()))
+        self.assertTrue(thumbnails.normalize(name))
+        with default_storage.open(name) as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (20, 40))
+            self.assertNotIn('exif', image.info)
+        self.assertFalse(thumbnails.normalize(name))
@@ -0,0 +1,170 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .cache import invalidate_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+Image.init()
+if 'AVIF' in Image.SAVE:
+    EXTENSIONS.setdefault('AVIF', 'avif')
+
+CARD_WIDTHS = (480, 960, 1440)
+CARD_RATIO = 339 / 960
+CARD_OPTIONS = {'crop': 'center', 'upscale': True}
+# Первый формат – запасной для <img>, остальные идут в <source>.
+FORMATS = [
+    image_format for image_format in ('JPEG', 'WEBP', 'AVIF')
+    if image_format in Image.SAVE
+]
+
+
+def card_geometry(width):
+    return f'{width}x{round(width * CARD_RATIO)}'
+
+
+# Все размеры и форматы, которые запрашивают шаблоны.
+SIZES = [
+    (card_geometry(width), dict(CARD_OPTIONS, format=image_format))
+    for width in CARD_WIDTHS
+    for image_format in FORMATS
+]
+WORKERS = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+
+executor = ThreadPoolExecutor(max_workers=WORKERS,
+                              thread_name_prefix='thumbnails')
+# Картинки, которые уже ждут в пуле, чтобы промахи не ставили их повторно.
+queued = set()
+queued_lock = threading.Lock()
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Отдает только готовые миниатюры и не строит их во время запроса.
+
+    Пока пул не построил миниатюру, показывается исходная картинка, а
+    построение ставится в очередь: так доходят и картинки, загруженные
+    до появления пула.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if options.pop('generate', False):
+            return super().get_thumbnail(file_, geometry_string, **options)
+        thumbnail = self.lookup(file_, geometry_string, **options)
+        if thumbnail:
+            return thumbnail
+        source = ImageFile(file_)
+        transaction.on_commit(lambda: queue(source.name))
+        return source
+
+    def lookup(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def generate(name):
+    created = False
+    for geometry, options in SIZES:
+        if not default.backend.lookup(name, geometry, **options):
+            default.backend.get_thumbnail(
+                name, geometry, generate=True, **options
+            )
+            created = True
+    return created
+
+
+def refresh(name):
+    """Сбрасывает кеши записей, которые показывали картинку без миниатюр."""
+    posts = Post.objects.filter(image=name).select_related('author', 'group')
+    posts.update(updated=timezone.now())
+    for post in posts:
+        invalidate_post(post)
+
+
+def normalize(name):
+    """Поворачивает картинку по EXIF и пересохраняет ее без метаданных."""
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        if 'exif' not in image.info:
+            return False
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+    image.info.pop('exif', None)
+    options = {'quality': 95} if image_format == 'JPEG' else {}
+    with default_storage.open(name, 'wb') as file:
+        image.save(file, format=image_format, **options)
+    default.kvstore.delete_thumbnails(ImageFile(name))
+    return True
+
+
+def generate_in_background(name, normalize_first=False):
+    try:
+        normalized = normalize_first and normalize(name)
+        if generate(name) or normalized:
+            refresh(name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    finally:
+        connection.close()
+
+
+def generate_queued(name, normalize_first=False):
+    try:
+        generate_in_background(name, normalize_first)
+    finally:
+        with queued_lock:
+            queued.discard(name)
+
+
+def queue(name, normalize_first=False):
+    """Ставит построение миниатюр картинки в пул, если его там нет."""
+    with queued_lock:
+        if name in queued:
+            return
+        queued.add(name)
+    executor.submit(generate_queued, name, normalize_first)
+
+
+def process_in_background(name):
+    generate_in_background(name, normalize_first=True)
+
+
+def wait():
+    """Дожидается миниатюр, уже поставленных в очередь; новые задачи
+    уходят в свежий пул."""
+    global executor
+    pending, executor = executor, ThreadPoolExecutor(
+        max_workers=WORKERS, thread_name_prefix='thumbnails'
+    )
+    pending.shutdown(wait=True)
+
+
+def schedule(post):
+    if post.image:
+        name = post.image.name
+        transaction.on_commit(
+            lambda: queue(name, normalize_first=True)
+        )
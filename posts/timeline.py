@@ -0,0 +1,196 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
+
+from .models import (Follow, Post, TimelineEntry, UserStats,
+                     comments_count)
+
+TIMELINE_DEPTH = getattr(settings, 'TIMELINE_DEPTH', 800)
+FANOUT_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+TRIM_EVERY = getattr(settings, 'TIMELINE_TRIM_EVERY', 50)
+
+
+def entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date
+    )
+
+
+def insert_entries(rows, ignore_conflicts=False):
+    """Вставляет в ленты строки (user_id, post_id, author_id, pub_date)
+    одним INSERT ... SELECT, не создавая объектов в Python."""
+    meta = TimelineEntry._meta
+    columns = ', '.join(
+        meta.get_field(name).column
+        for name in ('user', 'post', 'author', 'pub_date')
+    )
+    db = router.db_for_write(TimelineEntry)
+    ops = connections[db].ops
+    sql, params = rows.query.sql_with_params()
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            f'{ops.insert_statement(ignore_conflicts=ignore_conflicts)} '
+            f'{meta.db_table} ({columns}) SELECT * FROM ({sql}) entries '
+            f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts)}',
+            params
+        )
+
+
+def fan_out(post):
+    fan_out_many([post])
+
+
+def fan_out_many(posts):
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    for author_id, author_posts in by_author.items():
+        stats = UserStats.objects.for_user(author_posts[0].author)
+        if stats.followers_count > FANOUT_LIMIT:
+            continue
+        insert_entries(Follow.objects.filter(
+            author_id=author_id,
+            author__posts__pk__in=[post.pk for post in author_posts]
+        ).values_list(
+            'user_id', 'author__posts__pk', 'author_id',
+            'author__posts__pub_date'
+        ), ignore_conflicts=True)
+        if stats.posts_count % TRIM_EVERY < len(author_posts):
+            trim_followers(author_id)
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).only('pk', 'author_id', 'pub_date')[:TIMELINE_DEPTH]
+    TimelineEntry.objects.bulk_create(
+        [entry(user_id, post) for post in posts],
+        ignore_conflicts=True
+    )
+    trim(user_id)
+
+
+def drop_follower(author_id):
+    """Уменьшает число подписчиков автора.
+
+    Записи автора, у которого больше FANOUT_LIMIT подписчиков, не
+    раскладываются по лентам. Отписка, которая опускает его до лимита,
+    раскладывает его последние записи оставшимся подписчикам, иначе они
+    пропали бы из их лент. Проверка и уменьшение – один UPDATE, поэтому
+    переход замечает ровно одна отписка.
+    """
+    crossed = UserStats.objects.filter(
+        pk=author_id, followers_count=FANOUT_LIMIT + 1
+    ).update(followers_count=models.F('followers_count') - 1)
+    if not crossed:
+        UserStats.objects.change(author_id, followers_count=-1)
+        return
+    newest = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values('pk')[:TIMELINE_DEPTH]
+    insert_entries(Follow.objects.filter(
+        author_id=author_id, author__posts__pk__in=newest
+    ).values_list(
+        'user_id', 'author__posts__pk', 'author_id', 'author__posts__pub_date'
+    ), ignore_conflicts=True)
+    trim_followers(author_id)
+
+
+def rebuild(user_id):
+    """Заново собирает ленту из самых новых записей всех авторов, на
+    которых подписан пользователь."""
+    rows = Follow.objects.filter(
+        user_id=user_id, author__posts__isnull=False
+    ).order_by(
+        '-author__posts__pub_date', '-author__posts__pk'
+    ).values_list(
+        'user_id', 'author__posts__pk', 'author_id', 'author__posts__pub_date'
+    )
+    with transaction.atomic(using=router.db_for_write(TimelineEntry)):
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        insert_entries(rows[:TIMELINE_DEPTH])
+
+
+def unfollow(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def cutoff(user_id):
+    """Дата первой записи за пределами TIMELINE_DEPTH в ленте."""
+    return TimelineEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-post_id'
+    ).values('pub_date')[TIMELINE_DEPTH:TIMELINE_DEPTH + 1]
+
+
+def trim(user_id):
+    pub_date = cutoff(user_id).first()
+    if pub_date:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lte=pub_date['pub_date']
+        ).delete()
+
+
+def trim_followers(author_id):
+    """Обрезает ленты подписчиков автора до TIMELINE_DEPTH.
+
+    Раскладка вызывает ее на каждой TRIM_EVERY-й записи автора, так что
+    лента не растет без предела, а запись не платит за проверку всех
+    подписчиков каждый раз. Границы считаются одним запросом, удаление
+    идет только из переполненных лент.
+    """
+    over = Follow.objects.filter(author_id=author_id).annotate(
+        cutoff=models.Subquery(cutoff(models.OuterRef('user_id')))
+    ).filter(cutoff__isnull=False).values_list('user_id', 'cutoff')
+    for user_id, pub_date in over:
+        TimelineEntry.objects.filter(
+            user_id=user_id, pub_date__lte=pub_date
+        ).delete()
+
+
+def followed_authors(user):
+    """(id, имя, число подписчиков) авторов, на которых подписан
+    пользователь."""
+    return list(Follow.objects.filter(user=user).values_list(
+        'author_id', 'author__username', 'author__stats__followers_count'
+    ))
+
+
+def follow_feed(user, authors=None):
+    """Лента подписок для KeysetWindow.
+
+    Записи авторов с числом подписчиков больше FANOUT_LIMIT не лежат в
+    ленте: для каждого из них отдается своя выборка по индексу автора,
+    и страница сливается из них и ленты, без сортировки всех их записей.
+    """
+    if authors is None:
+        authors = followed_authors(user)
+    celebrities = [
+        author_id for author_id, _, followers in authors
+        if followers is not None and followers > FANOUT_LIMIT
+    ]
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).annotate(
+        comments_count=comments_count('post_id')
+    ).order_by('-pub_date', '-post_id')
+    if not celebrities:
+        return entries
+    return [entries.exclude(author_id__in=celebrities)] + [
+        Post.objects.for_feed().filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        )
+        for author_id in celebrities
+    ]
+
+
+def feed_item(row):
+    if isinstance(row, TimelineEntry):
+        row.post.comments_count = row.comments_count
+        return row.post
+    return row
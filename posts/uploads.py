@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+MAX_UPLOAD_SIZE = getattr(settings, 'MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+MAX_IMAGE_PIXELS = getattr(settings, 'MAX_IMAGE_PIXELS', 40 * 1000 * 1000)
+# Запас на текстовые поля формы и заголовки частей multipart.
+FORM_OVERHEAD = 64 * 1024
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл и бросает ее хвост после лимита.
+
+    Запрос, чей Content-Length больше лимита с запасом на поля формы,
+    отклоняется с кодом 400 до чтения тела. Файл, который превысил
+    лимит в пределах запаса, дочитывается без записи, а его полный
+    размер достается валидатору.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        limit = getattr(settings, 'MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+        if content_length > limit + FORM_OVERHEAD:
+            raise RequestDataTooBig(
+                'Тело запроса больше MAX_UPLOAD_SIZE.'
+            )
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.limit = getattr(settings, 'MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= self.limit:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.size = self.received
+        return upload
+
+
+def validate_image_upload(file):
+    # Проверяются только новые загрузки: уже сохраненный файл при правке
+    # записи не читается, его может и не быть в хранилище.
+    if not isinstance(file, UploadedFile) and getattr(file, '_committed',
+                                                      True):
+        return
+    limit = getattr(settings, 'MAX_UPLOAD_SIZE', MAX_UPLOAD_SIZE)
+    try:
+        size = file.size
+        position = file.tell()
+    except OSError:
+        raise ValidationError('Не удалось прочитать файл.',
+                              code='invalid_image')
+    if size > limit:
+        raise ValidationError(
+            'Файл слишком большой: %(size)s, можно не больше %(limit)s.',
+            code='file_too_large',
+            params={'size': filesizeformat(size),
+                    'limit': filesizeformat(limit)},
+        )
+    max_pixels = getattr(settings, 'MAX_IMAGE_PIXELS', MAX_IMAGE_PIXELS)
+    file.seek(0)
+    try:
+        # Image.open читает только заголовок, пиксели не декодируются.
+        width, height = Image.open(file).size
+    except Image.DecompressionBombError:
+        width = height = max_pixels
+    except Exception:
+        raise ValidationError(
+            'Загрузите правильное изображение: файл не читается или '
+            'поврежден.',
+            code='invalid_image',
+        )
+    finally:
+        file.seek(position)
+    if width * height > max_pixels:
+        raise ValidationError(
+            'Слишком большое разрешение, можно не больше %(limit)s '
+            'мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': max_pixels // 1000000},
+        )
@@ -2,34 +2,38 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect, reverse
+from django.utils.http import urlencode
 
+from .cache import (cache_anonymous_page, conditional_page,
+                    conditional_page_response)
 from .forms import PostForm, CommentForm
-from .models import Post, Group, Follow, Comment
+from .models import Post, Group, Follow, Comment, UserStats
+from .paginator import POSTS_PER_PAGE, paginate
+from .search import search_posts
+from .timeline import feed_item, follow_feed, followed_authors
 
 User = get_user_model()
 
 
+@conditional_page(lambda request: ['index'])
+@cache_anonymous_page(lambda: ['index'])
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginate(request, Post.objects.for_feed())
     return render(request, 'index.html', {'page': page})
 
 
+@conditional_page(lambda request, slug: [f'group:{slug}'])
+@cache_anonymous_page(lambda slug: [f'group:{slug}'])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginate(request, group.posts.for_feed())
     return render(request, 'group.html', {'group': group,
                                           'page': page})
 
 
 @login_required
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -48,43 +52,45 @@ def post_delete(request, username, post_id):
     return redirect(redirect_url)
 
 
+@conditional_page(lambda request, username: [f'author:{username}'])
+@cache_anonymous_page(lambda username: [f'author:{username}'])
 def profile(request, username):
-    user = User.objects.get(username=username)
-    posts = user.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    number_of_posts = posts.count()
-    number_of_following = user.follower.count()
-    number_of_followers = user.following.count()
+    user = get_object_or_404(User, username=username)
+    page = paginate(request, user.posts.for_feed())
+    stats = UserStats.objects.for_user(user)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author__username=username
     ).exists()
     context = {
         'author': user,
-        'number_of_posts': number_of_posts,
-        'number_of_followers': number_of_followers,
-        'number_of_following': number_of_following,
+        'number_of_posts': stats.posts_count,
+        'number_of_followers': stats.followers_count,
+        'number_of_following': stats.following_count,
         'page': page,
         'following': following
     }
     return render(request, 'profile.html', context)
 
 
+@conditional_page(lambda request, username, post_id: [
+    f'author:{username}', f'post:{post_id}'
+])
+@cache_anonymous_page(lambda username, post_id: [
+    f'author:{username}', f'post:{post_id}'
+])
 def post_view(request, username, post_id):
     form = CommentForm(request.POST or None)
 
-    single_post = get_object_or_404(Post, author__username=username,
+    single_post = get_object_or_404(Post.objects.for_feed(),
+                                    author__username=username,
                                     id=post_id)
-    comments = single_post.comments.all()
-    number_of_posts = single_post.author.posts.count()
-    number_of_following = single_post.author.follower.count()
-    number_of_followers = single_post.author.following.count()
+    comments = single_post.comments.select_related('author')
+    stats = UserStats.objects.for_user(single_post.author)
     context = {
-        'number_of_posts': number_of_posts,
-        'number_of_followers': number_of_followers,
-        'number_of_following': number_of_following,
+        'number_of_posts': stats.posts_count,
+        'number_of_followers': stats.followers_count,
+        'number_of_following': stats.following_count,
         'post': single_post,
         'form': form,
         'comments': comments,
@@ -157,42 +163,46 @@ def comment_delete(request, username, post_id, comment_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {
-        'page': page,
-        'paginator': paginator})
+    authors = followed_authors(request.user)
+    scopes = [f'author:{request.user.username}'] + [
+        f'author:{username}' for _, username, _ in authors
+    ]
+
+    def get_response():
+        page = paginate(request, follow_feed(request.user, authors),
+                        item=feed_item)
+        return render(request, 'follow.html', {
+            'page': page,
+            'paginator': page.paginator})
+    return conditional_page_response(request, scopes, get_response)
 
 
 @login_required
 def profile_follow(request, username):
-    if username == request.user.username:
-        return redirect('follow_index')
-    Follow.objects.get_or_create(
-        user=request.user,
-        author=get_object_or_404(User, username=username)
-    )
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.follow(request.user, author)
     return redirect('follow_index')
 
 
 @login_required
 def profile_unfollow(request, username):
-    instance = Follow.objects.get(
-        user=request.user,
-        author=get_object_or_404(User, username=username)
+    Follow.objects.unfollow(
+        request.user,
+        get_object_or_404(User, username=username)
     )
-    instance.delete()
     return redirect('follow_index')
 
 
 def search_results(request):
-    if request.method == 'POST':
-        searched = request.POST['searched']
-        posts = Post.objects.filter(text__contains=searched)
-        return render(
-            request,
-            'search_results.html',
-            {'searched': searched, 'posts': posts})
-    return render(request, 'search_results.html')
+    searched = request.GET.get('q') or request.POST.get('searched', '')
+    if not searched.strip():
+        return render(request, 'search_results.html')
+    paginator = Paginator(search_posts(searched), POSTS_PER_PAGE)
+    page_number = request.GET.get('page')
+    page = paginator.get_page(page_number)
+    return render(request, 'search_results.html', {
+        'searched': searched,
+        'page': page,
+        'query_string': urlencode({'q': searched})
+    })
@@ -0,0 +1,301 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires)',
+)
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+def dumps(value):
+    if type(value) is int:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class LocalTier:
+    """Короткоживущая копия значений внутри процесса перед SQLite."""
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов на машине.
+
+    Записей не больше MAX_ENTRIES: лишние вытесняются по давности
+    последнего чтения. L1_TIMEOUT включает копию значений в памяти
+    процесса на указанное число секунд; изменения из других процессов
+    видны с такой задержкой.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.lru_resolution = options.get('LRU_RESOLUTION', 1)
+        l1_timeout = options.get('L1_TIMEOUT', 0)
+        self.l1 = LocalTier(
+            l1_timeout, options.get('L1_MAX_ENTRIES', 1000)
+        ) if l1_timeout else None
+        self.local = threading.local()
+
+    @property
+    def db(self):
+        db = getattr(self.local, 'db', None)
+        if db is None or self.local.pid != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not os.path.exists(self.location):
+                # В кеше лежат данные пользователей: файл, а за ним -wal
+                # и -shm, доступны только владельцу.
+                os.close(os.open(self.location, os.O_CREAT | os.O_WRONLY,
+                                 0o600))
+            db = sqlite3.connect(
+                self.location, timeout=30, isolation_level=None,
+                check_same_thread=False
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self.local.db = db
+            self.local.pid = os.getpid()
+        return db
+
+    def expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else time.time() + timeout
+
+    def fetch(self, keys):
+        now = time.time()
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ','.join('?' * len(chunk))
+            rows = self.db.execute(
+                f'SELECT key, value, expires, accessed FROM cache '
+                f'WHERE key IN ({marks}) AND {ALIVE}', chunk + [now]
+            ).fetchall()
+            stale = [key for key, _, _, accessed in rows
+                     if accessed < now - self.lru_resolution]
+            if stale:
+                marks = ','.join('?' * len(stale))
+                self.db.execute(
+                    f'UPDATE cache SET accessed = ? WHERE key IN ({marks})',
+                    [now] + stale
+                )
+            for key, value, _, _ in rows:
+                found[key] = loads(value)
+                self.store(key, value)
+        return found
+
+    def store(self, key, value):
+        if self.l1:
+            self.l1.set(key, value)
+
+    def forget(self, *keys):
+        if self.l1:
+            self.l1.delete(*keys)
+
+    def cull(self):
+        now = time.time()
+        self.db.execute('DELETE FROM cache WHERE expires <= ?', [now])
+        excess = self.db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0] - self._max_entries
+        if excess > 0:
+            if not self._cull_frequency:
+                self.db.execute('DELETE FROM cache')
+                return
+            excess = max(excess, self._max_entries // self._cull_frequency)
+            self.db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)', [excess]
+            )
+
+    def write(self, rows):
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)', rows
+            )
+            self.cull()
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if self.l1:
+            entry = self.l1.get(key)
+            if entry is not None:
+                return loads(entry[1])
+        return self.fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_key(key, version=version): key for key in keys}
+        for key in keys:
+            self.validate_key(key)
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self.l1 and self.l1.get(key)
+            if entry:
+                found[key] = loads(entry[1])
+            else:
+                missing.append(key)
+        if missing:
+            found.update(self.fetch(missing))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.expiry(timeout)
+        now = time.time()
+        rows = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            rows.append((key, dumps(value), expires, now))
+        self.forget(*(row[0] for row in rows))
+        self.write(rows)
+        for key, value, _, _ in rows:
+            self.store(key, value)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+        value = dumps(value)
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM cache WHERE key = ? AND NOT ' + ALIVE,
+                       [key, now])
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                [key, value, self.expiry(timeout), now]
+            ).rowcount == 1
+            if added:
+                self.cull()
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        if added:
+            self.store(key, value)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? AND ' + ALIVE,
+                [key, time.time()]
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = loads(row[0]) + delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?',
+                       [dumps(value), key])
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        self.store(key, value)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self.db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND ' + ALIVE,
+            [self.expiry(timeout), key, time.time()]
+        ).rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self.forget(key)
+        return self.db.execute(
+            'DELETE FROM cache WHERE key = ?', [key]
+        ).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self.db.execute(
+            'SELECT 1 FROM cache WHERE key = ? AND ' + ALIVE,
+            [key, time.time()]
+        ).fetchone() is not None
+
+    def clear(self):
+        if self.l1:
+            self.l1.clear()
+        self.db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        pass
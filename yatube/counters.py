@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+
+class Counters:
+    """Счетчики процесса, которые копятся в памяти и раз в flush_seconds
+    прибавляются к общим счетчикам в кеше, чтобы видеть сумму по всем
+    воркерам."""
+
+    def __init__(self, prefix, flush_seconds=10):
+        self.prefix = prefix
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+
+    def key(self, name):
+        return f'{self.prefix}:{name}'
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.pending[name] += value
+
+    def flush(self, force=False):
+        if (not force
+                and time.monotonic() - self.flushed_at < self.flush_seconds):
+            return {}
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+        for name, value in pending.items():
+            key = self.key(name)
+            if not cache.add(key, value, None):
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    cache.set(key, value, None)
+        return pending
+
+    def get(self, names):
+        counters = cache.get_many([self.key(name) for name in names])
+        return {name: counters.get(self.key(name), 0) for name in names}
+
+    def reset(self, names):
+        cache.delete_many([self.key(name) for name in names])
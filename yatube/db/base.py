@@ -0,0 +1,122 @@
+import re
+import threading
+import time
+import weakref
+
+from django.db.backends.sqlite3 import base
+
+from .metrics import metrics
+
+PRAGMA_NAME = re.compile(r'^\w+$')
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+CONNECTION_WAIT = 10
+
+slots = {}
+slots_lock = threading.Lock()
+
+
+def get_slots(alias, limit):
+    with slots_lock:
+        if alias not in slots:
+            slots[alias] = threading.BoundedSemaphore(limit)
+        return slots[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с настройками соединения из ключа PRAGMAS в DATABASES.
+
+    Соединения, которые переживают запрос (CONN_MAX_AGE), проверяются
+    перед первым запросом к базе в новом HTTP-запросе, если включен
+    CONN_HEALTH_CHECKS. MAX_CONNECTIONS ограничивает число открытых
+    соединений на процесс: лишние потоки ждут до CONNECTION_WAIT секунд.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.slot = None
+
+    def get_pragmas(self):
+        pragmas = dict(DEFAULT_PRAGMAS)
+        pragmas.update(self.settings_dict.get('PRAGMAS') or {})
+        return pragmas
+
+    def acquire_slot(self):
+        limit = self.settings_dict.get('MAX_CONNECTIONS')
+        if not limit:
+            return
+        semaphore = get_slots(self.alias, limit)
+        if not semaphore.acquire(blocking=False):
+            metrics.count('waited')
+            wait = self.settings_dict.get('CONNECTION_WAIT', CONNECTION_WAIT)
+            if not semaphore.acquire(timeout=wait):
+                raise base.Database.OperationalError(
+                    f'Все {limit} соединений с базой {self.alias} заняты'
+                )
+        # Если поток завершится, не закрыв соединение, место освободит
+        # сборщик мусора вместе с самой обёрткой.
+        self.slot = weakref.finalize(self, semaphore.release)
+
+    def release_slot(self):
+        if self.slot is not None:
+            self.slot()
+            self.slot = None
+
+    def get_new_connection(self, conn_params):
+        self.acquire_slot()
+        start = time.perf_counter()
+        try:
+            conn = super().get_new_connection(conn_params)
+            for name, value in self.get_pragmas().items():
+                if value is None:
+                    continue
+                if not PRAGMA_NAME.match(name) or not PRAGMA_NAME.match(
+                        str(value).lstrip('-')):
+                    raise ValueError(
+                        f'Недопустимая настройка SQLite: {name}'
+                    )
+                conn.execute(f'PRAGMA {name} = {value}')
+        except Exception:
+            self.release_slot()
+            raise
+        metrics.count('created')
+        metrics.count('setup_us', int((time.perf_counter() - start) * 1e6))
+        return conn
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_slot()
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def ensure_connection(self):
+        if not self.health_check_done and not self.in_atomic_block:
+            self.health_check_done = True
+            if self.connection is not None:
+                if (self.settings_dict.get('CONN_HEALTH_CHECKS')
+                        and not self.is_usable()):
+                    metrics.count('unhealthy')
+                    self.close()
+                else:
+                    metrics.count('reused')
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        # Вызывается Django в начале и в конце каждого HTTP-запроса.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+        metrics.flush()
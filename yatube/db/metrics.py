@@ -0,0 +1,13 @@
+from yatube.counters import Counters
+
+FIELDS = ('created', 'reused', 'unhealthy', 'waited', 'setup_us')
+
+metrics = Counters('db:connections')
+
+
+def stats():
+    return metrics.get(FIELDS)
+
+
+def reset():
+    metrics.reset(FIELDS)
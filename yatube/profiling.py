@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends import django as django_backend
+
+from .counters import Counters
+
+FIELDS = ('requests', 'queries', 'sql_us', 'render_us', 'duplicates')
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+URLS_KEY = 'profiling:urls'
+DUPLICATES_KEY = 'profiling:duplicates:{}'
+
+state = threading.local()
+counters = Counters('profiling')
+# Текст отпечатков, которые процесс уже считал, по их хешам.
+fingerprints = {}
+
+
+def fingerprint(sql):
+    return NUMBER.sub('?', IN_LIST.sub('(...)', sql))
+
+
+def digest(fingerprint):
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+
+def current():
+    return getattr(state, 'profile', None)
+
+
+class Profile:
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.render = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.most_common()
+                if count > 1}
+
+
+class ProfiledTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        profile = current()
+        if profile is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.render += time.perf_counter() - start
+
+
+class ProfiledDjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблоны Django, которые засекают время отрисовки для профилировщика
+    запросов."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(
+            super().get_template(template_name).template, self
+        )
+
+
+def record(url_name, profile):
+    counters.count(f'{url_name}:requests')
+    counters.count(f'{url_name}:queries', profile.queries)
+    counters.count(f'{url_name}:sql_us', int(profile.sql * 1e6))
+    counters.count(f'{url_name}:render_us', int(profile.render * 1e6))
+    duplicates = profile.duplicates()
+    counters.count(f'{url_name}:duplicates', sum(duplicates.values()))
+    for sql, count in duplicates.items():
+        key = digest(sql)
+        fingerprints[key] = sql
+        counters.count(f'{url_name}:duplicate-{key}', count)
+    flush()
+
+
+def flush(force=False):
+    flushed = counters.flush(force)
+    if flushed:
+        register(flushed)
+
+
+def register(names):
+    """Запоминает в кеше имена URL и тексты их повторяющихся запросов,
+    чтобы stats() знала, какие счетчики читать."""
+    duplicates = {}
+    for name in names:
+        url_name, field = name.rsplit(':', 1)
+        duplicates.setdefault(url_name, {})
+        if field.startswith('duplicate-'):
+            key = field[len('duplicate-'):]
+            duplicates[url_name][key] = fingerprints.get(key, '')
+    known = cache.get(URLS_KEY, set())
+    if not known.issuperset(duplicates):
+        cache.set(URLS_KEY, known.union(duplicates), None)
+    for url_name, texts in duplicates.items():
+        if not texts:
+            continue
+        known = cache.get(DUPLICATES_KEY.format(url_name), {})
+        if not known.keys() >= texts.keys():
+            cache.set(DUPLICATES_KEY.format(url_name),
+                      {**texts, **known}, None)
+
+
+def stats():
+    """Суммы по имени URL; в 'fingerprints' – сколько раз повторялся
+    каждый отпечаток запроса."""
+    result = {}
+    for url_name in sorted(cache.get(URLS_KEY, set())):
+        texts = cache.get(DUPLICATES_KEY.format(url_name), {})
+        names = {field: f'{url_name}:{field}' for field in FIELDS}
+        names.update({key: f'{url_name}:duplicate-{key}' for key in texts})
+        values = counters.get(list(names.values()))
+        result[url_name] = {field: values[names[field]]
+                            for field in FIELDS}
+        result[url_name]['fingerprints'] = {
+            sql: values[names[key]] for key, sql in sorted(
+                texts.items(), key=lambda item: -values[names[item[0]]]
+            )
+        }
+    return result
+
+
+def write_slow_request(entry):
+    path = settings.SLOW_REQUEST_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as log:
+        log.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class QueryProfilingMiddleware:
+    """Профилирует долю PROFILING_SAMPLE_RATE запросов: число и время
+    SQL-запросов, время отрисовки шаблонов и повторяющиеся запросы.
+
+    Итоги копятся по имени URL, у профилированных ответов есть заголовок
+    Server-Timing, а запросы дольше SLOW_REQUEST_MS пишутся в JSONL-файл
+    SLOW_REQUEST_LOG.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        profile = Profile() if random.random() < rate else None
+        start = time.perf_counter()
+        if profile is None:
+            response = self.get_response(request)
+        else:
+            state.profile = profile
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(
+                            connection.execute_wrapper(profile)
+                        )
+                    response = self.get_response(request)
+            finally:
+                state.profile = None
+        total = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        if profile is not None:
+            record(url_name or '-', profile)
+            response['Server-Timing'] = (
+                f'sql;dur={profile.sql * 1000:.1f};'
+                f'desc="{profile.queries} queries", '
+                f'render;dur={profile.render * 1000:.1f}, '
+                f'total;dur={total * 1000:.1f}'
+            )
+        if total * 1000 >= getattr(settings, 'SLOW_REQUEST_MS', 500):
+            entry = {
+                'time': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'url_name': url_name,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'sampled': profile is not None,
+            }
+            if profile is not None:
+                entry.update({
+                    'queries': profile.queries,
+                    'sql_ms': round(profile.sql * 1000, 1),
+                    'render_ms': round(profile.render * 1000, 1),
+                    'duplicates': profile.duplicates(),
+                })
+            write_slow_request(entry)
+        return response
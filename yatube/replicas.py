@@ -0,0 +1,77 @@
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+state = threading.local()
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def is_pinned():
+    return getattr(state, 'pinned', False)
+
+
+def pin():
+    state.pinned = True
+
+
+def unpin():
+    state.pinned = False
+    state.wrote = False
+
+
+class ReplicaRouter:
+    """Читает с реплик, пишет в основную базу.
+
+    После первой записи чтения в этом же потоке идут в основную базу,
+    чтобы не увидеть реплику, которая еще не догнала запись.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or is_pinned():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        pin()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaPinningMiddleware:
+    """Привязывает к основной базе изменяющие запросы и сессию, которая
+    только что писала: она увидит свои записи и на следующих страницах.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unpin()
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            pin()
+        try:
+            response = self.get_response(request)
+            if getattr(state, 'wrote', False) and get_replicas():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                    httponly=True
+                )
+        finally:
+            unpin()
+        return response
@@ -32,7 +32,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.profiling.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.replicas.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -47,16 +49,28 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.StableCursorPagination',
+    'PAGE_SIZE': 20,
 }
+TOKEN_CACHE_TIMEOUT = 60 * 5
+
+API_MAX_PAGE_SIZE = 100
+
+# Профилирование запросов: доля профилируемых запросов и порог, после
+# которого запрос попадает в журнал медленных.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0.05))
+SLOW_REQUEST_MS = 500
+SLOW_REQUEST_LOG = os.path.join(BASE_DIR, 'logs', 'slow_requests.jsonl')
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.profiling.ProfiledDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,11 +88,40 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.db',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живет между запросами и проверяется перед повторным
+        # использованием; MAX_CONNECTIONS ограничивает их число на процесс.
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'MAX_CONNECTIONS': int(os.environ.get('DB_MAX_CONNECTIONS', 20)),
+        'CONNECTION_WAIT': 10,
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64000,
+            'temp_store': 'MEMORY',
+        },
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
+# Копии базы только для чтения, например файлы SQLite, которые
+# обновляет manage.py sync_replicas: SQLITE_REPLICAS=/tmp/r1.db,/tmp/r2.db
+for number, path in enumerate(
+        filter(None, os.environ.get('SQLITE_REPLICAS', '').split(','))):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'], NAME=path, TEST={'MIRROR': 'default'}
+    )
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['yatube.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -110,6 +153,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+THUMBNAIL_WORKERS = 2
+
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
 
@@ -118,6 +168,17 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'L1_TIMEOUT': 1,
+        },
     }
 }
+
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
+PAGE_CACHE_TIMEOUT = 60 * 15
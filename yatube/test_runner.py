@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def isolated_cache():
+    """Переносит SQLite-кеш во временный каталог, чтобы тесты не
+    очищали и не засоряли кеш запущенного сервера."""
+    directory = tempfile.mkdtemp()
+    caches = {
+        alias: dict(
+            options, LOCATION=os.path.join(directory, f'{alias}.sqlite3')
+        ) if options['BACKEND'] == 'yatube.cache.SQLiteCache' else options
+        for alias, options in settings.CACHES.items()
+    }
+    try:
+        with override_settings(CACHES=caches):
+            try:
+                yield directory
+            finally:
+                from posts import thumbnails
+                thumbnails.wait()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner с отдельным файлом кеша на время прогона."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache = isolated_cache()
+        self.cache.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)